@@ -0,0 +1 @@
+# Initialize ai package
\ No newline at end of file
@@ -0,0 +1,181 @@
+import time
+from typing import List, Optional, Tuple
+
+from models.board import EMPTY, Board
+
+# Valor de una victoria real (solo la búsqueda lo asigna)
+WIN_SCORE = 1_000_000_000
+# Valor heurístico de completar una línea (propia o bloqueando la rival);
+# acumulado a lo largo de la búsqueda sigue lejos de WIN_SCORE
+LINE_SCORE = WIN_SCORE // 100
+
+# Candidatos explorados por nodo (los mejores según la heurística local)
+ROOT_BRANCHING = 24
+BRANCHING = 10
+
+# Cada cuántos nodos se revisa el plazo
+DEADLINE_CHECK_EVERY = 256
+
+# Peso de una línea según cuántas fichas propias tendría y cuántos extremos libres
+_OPEN_WEIGHT = (0, 1, 4)
+
+
+class _Timeout(Exception):
+    pass
+
+
+class _Search:
+    """Negamax con poda alfa-beta sobre un Board, con plazo de tiempo.
+
+    Solo se consideran casillas vacías junto a alguna ficha y, en cada
+    nodo, las mejores según una heurística local (líneas propias que se
+    alargan y líneas rivales que se bloquean), así el costo por nodo no
+    depende del tamaño del tablero.
+    """
+
+    def __init__(self, board: Board, deadline: float):
+        self.board = board
+        self.deadline = deadline
+        self.nodes = 0
+        self.stones: List[int] = [i for i, cell in enumerate(board.cells) if cell]
+
+    def _line_value(self, position: int, stone: int) -> int:
+        """Valor de poner `stone` en `position` según las líneas que forma."""
+        board = self.board
+        cells = board.cells
+        size = board.size
+        need = board.win_length
+        row, col = divmod(position, size)
+        value = 0
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            count = 1
+            open_ends = 0
+            for sign in (1, -1):
+                r, c = row + dr * sign, col + dc * sign
+                while count < need and 0 <= r < size and 0 <= c < size \
+                        and cells[r * size + c] == stone:
+                    count += 1
+                    r += dr * sign
+                    c += dc * sign
+                if 0 <= r < size and 0 <= c < size and cells[r * size + c] == EMPTY:
+                    open_ends += 1
+            if count >= need:
+                return LINE_SCORE
+            value += 10 ** count * _OPEN_WEIGHT[open_ends]
+        return value
+
+    def _candidates(self, stone: int, limit: int) -> List[Tuple[int, int]]:
+        """Casillas vecinas a las fichas, ordenadas por (ataque + defensa)."""
+        board = self.board
+        cells = board.cells
+        size = board.size
+        seen = set()
+        scored = []
+        other = 3 - stone
+        for position in self.stones:
+            row, col = divmod(position, size)
+            for r in range(max(row - 1, 0), min(row + 2, size)):
+                for c in range(max(col - 1, 0), min(col + 2, size)):
+                    p = r * size + c
+                    if cells[p] or p in seen:
+                        continue
+                    seen.add(p)
+                    scored.append((self._line_value(p, stone) + self._line_value(p, other), p))
+        if not scored:
+            # Sin casillas junto a las fichas: cualquier casilla libre
+            scored = [(0, p) for p, cell in enumerate(cells) if not cell]
+        scored.sort(reverse=True)
+        return [(p, gain) for gain, p in scored[:limit]]
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes % DEADLINE_CHECK_EVERY == 0 and time.monotonic() > self.deadline:
+            raise _Timeout()
+
+    def _play(self, position: int, stone: int) -> bool:
+        won = self.board.place(position, stone)
+        self.stones.append(position)
+        return won
+
+    def _undo(self, position: int):
+        self.board.remove(position)
+        self.stones.pop()
+
+    def _negamax(self, stone: int, depth: int, alpha: int, beta: int, score: int) -> int:
+        """Valor de la posición para `stone` (en turno); `score` es la heurística acumulada."""
+        self._tick()
+        if depth == 0:
+            return score
+        candidates = self._candidates(stone, BRANCHING)
+        if not candidates:
+            return 0  # Tablero lleno: empate
+        best = -WIN_SCORE * 2
+        for position, gain in candidates:
+            if self._play(position, stone):
+                value = WIN_SCORE + depth  # Ganar antes vale más
+            else:
+                value = -self._negamax(3 - stone, depth - 1, -beta, -alpha, -(score + gain))
+            self._undo(position)
+            if value > best:
+                best = value
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+        return best
+
+    def _root(self, stone: int, depth: int, candidates: List[Tuple[int, int]]) -> Tuple[int, int]:
+        best_move, best = candidates[0][0], -WIN_SCORE * 2
+        alpha = -WIN_SCORE * 2
+        for position, gain in candidates:
+            if self._play(position, stone):
+                value = WIN_SCORE + depth
+            else:
+                value = -self._negamax(3 - stone, depth - 1, -WIN_SCORE * 2, -alpha, -gain)
+            self._undo(position)
+            if value > best:
+                best_move, best = position, value
+                alpha = max(alpha, value)
+        return best_move, best
+
+    def run(self, stone: int, max_depth: int) -> Tuple[int, int]:
+        """Profundización iterativa: la mejor jugada de la última profundidad completa."""
+        board = self.board
+        if not self.stones:
+            return (board.size // 2) * board.size + board.size // 2, 0
+        candidates = self._candidates(stone, ROOT_BRANCHING)
+        if not candidates:
+            raise ValueError("La partida ya terminó")
+        best_move, depth_done = candidates[0][0], 0
+        for depth in range(1, max_depth + 1):
+            try:
+                move, value = self._root(stone, depth, candidates)
+            except _Timeout:
+                break
+            best_move, depth_done = move, depth
+            if abs(value) >= WIN_SCORE:
+                break  # Resultado forzado: más profundidad no lo cambia
+            # La mejor jugada se explora primero en la siguiente iteración
+            candidates.sort(key=lambda item: item[0] != move)
+        return best_move, depth_done
+
+
+def search_move(size: int, win_length: int, cells: str, stone: int,
+                time_budget: float, max_depth: int = 6) -> Tuple[int, int]:
+    """Mejor casilla para `stone` en el tablero serializado `cells`.
+
+    Se ejecuta en un proceso del pool del AIService (debe ser una función de
+    módulo). Retorna (casilla, profundidad completada); si el plazo se agota,
+    la jugada de la última profundidad terminada (o la mejor según la
+    heurística si no terminó ninguna).
+    """
+    board = Board.from_string(cells, size, win_length)
+    return _Search(board, time.monotonic() + time_budget).run(stone, max_depth)
+
+
+def quick_move(size: int, win_length: int, cells: str, stone: int) -> Optional[int]:
+    """Jugada heurística sin búsqueda (respaldo si el pool no está disponible)."""
+    try:
+        return search_move(size, win_length, cells, stone, 0.0, 0)[0]
+    except ValueError:
+        return None
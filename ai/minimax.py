@@ -0,0 +1,173 @@
+import random
+from enum import Enum
+from typing import Dict, Optional, Tuple
+
+from ai.solved_table import SolvedTable
+from models.game import FULL_BOARD, WINNING_BITS
+
+
+class AIPlayer(Enum):
+    COMPUTER = "O"
+    HUMAN = "X"
+
+
+# Orden de exploración: centro, esquinas y luego bordes (mejora la poda)
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Las 8 simetrías del tablero expresadas como permutaciones de casillas:
+# _SYMMETRIES[s][i] es la casilla a la que va i bajo la simetría s.
+_SYMMETRIES = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),  # identidad
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),  # rotación 90°
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),  # rotación 180°
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),  # rotación 270°
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),  # reflejo horizontal
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),  # reflejo vertical
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),  # diagonal principal
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),  # diagonal secundaria
+)
+
+
+def _permute_bits(bits: int, perm: Tuple[int, ...]) -> int:
+    result = 0
+    for i in range(9):
+        if bits >> i & 1:
+            result |= 1 << perm[i]
+    return result
+
+
+# Tablas de 512 entradas por simetría para transformar un bitboard en O(1)
+_SYMMETRY_TABLES = tuple(
+    tuple(_permute_bits(bits, perm) for bits in range(FULL_BOARD + 1))
+    for perm in _SYMMETRIES
+)
+
+# Banderas de las entradas de la tabla de transposición
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Tabla de transposición compartida por todas las partidas del proceso:
+# clave canónica -> (valor, bandera, mejor casilla en el marco canónico)
+_TRANSPOSITION_TABLE: Dict[int, Tuple[int, int, int]] = {}
+
+
+def canonical_key(me: int, opp: int) -> Tuple[int, int]:
+    """Retorna la clave canónica de la posición y la simetría que la produce."""
+    best_key = -1
+    best_sym = 0
+    for s, table in enumerate(_SYMMETRY_TABLES):
+        key = table[me] << 9 | table[opp]
+        if best_key < 0 or key < best_key:
+            best_key = key
+            best_sym = s
+    return best_key, best_sym
+
+
+def _popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+class MiniMaxAI:
+    """IA de triqui basada en Minimax (negamax) con poda Alpha-Beta.
+
+    Los valores se expresan desde el punto de vista del jugador en turno:
+    ganar vale 1 + casillas vacías (se prefieren las victorias rápidas),
+    perder el negativo y empatar 0.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None,
+                 solved_table: Optional[SolvedTable] = None):
+        self._rng = rng or random.Random()
+        self._solved_table = solved_table
+        self.nodes_evaluated = 0
+        self.pruned_nodes = 0
+
+    @staticmethod
+    def table_size() -> int:
+        return len(_TRANSPOSITION_TABLE)
+
+    def _lookup_solved(self, me: int, opp: int) -> Optional[Tuple[int, int]]:
+        if self._solved_table is None:
+            return None
+        # X mueve cuando ambos lados tienen el mismo número de fichas
+        if _popcount(me) == _popcount(opp):
+            return self._solved_table.lookup(me, opp)
+        return self._solved_table.lookup(opp, me)
+
+    def evaluate(self, me: int, opp: int) -> int:
+        """Valor exacto de la posición para el jugador en turno."""
+        solved = self._lookup_solved(me, opp)
+        if solved is not None:
+            return solved[1]
+        return self._negamax(me, opp, -100, 100)
+
+    def find_best_move(self, me: int, opp: int) -> int:
+        """Mejor casilla (0-8) para el jugador cuyo bitboard es `me`."""
+        occupied = me | opp
+        if occupied == FULL_BOARD or WINNING_BITS[me] or WINNING_BITS[opp]:
+            raise ValueError("La partida ya terminó")
+
+        solved = self._lookup_solved(me, opp)
+        if solved is not None:
+            return solved[0]
+
+        key, sym = canonical_key(me, opp)
+        entry = _TRANSPOSITION_TABLE.get(key)
+        if entry is None or entry[1] != EXACT:
+            # Una búsqueda con ventana completa deja un valor exacto en la tabla
+            self._negamax(me, opp, -100, 100)
+            entry = _TRANSPOSITION_TABLE[key]
+        # Deshacer la simetría para llevar la casilla al marco original
+        return _SYMMETRIES[sym].index(entry[2])
+
+    def get_difficulty_move(self, me: int, opp: int, difficulty: str = "hard") -> int:
+        """Casilla elegida según la dificultad (easy, medium o hard)."""
+        if difficulty == "easy" or (difficulty == "medium" and self._rng.random() < 0.3):
+            free = [i for i in range(9) if not (me | opp) >> i & 1]
+            return self._rng.choice(free)
+        return self.find_best_move(me, opp)
+
+    def _negamax(self, me: int, opp: int, alpha: int, beta: int) -> int:
+        self.nodes_evaluated += 1
+        occupied = me | opp
+        empties = 9 - _popcount(occupied)
+        if WINNING_BITS[opp]:
+            return -(1 + empties)
+        if not empties:
+            return 0
+
+        key, sym = canonical_key(me, opp)
+        entry = _TRANSPOSITION_TABLE.get(key)
+        if entry is not None:
+            value, flag, _ = entry
+            if flag == EXACT:
+                return value
+            if flag == LOWER and value >= beta:
+                return value
+            if flag == UPPER and value <= alpha:
+                return value
+
+        original_alpha = alpha
+        best_value = -100
+        best_move = -1
+        for i, pos in enumerate(MOVE_ORDER):
+            bit = 1 << pos
+            if occupied & bit:
+                continue
+            value = -self._negamax(opp, me | bit, -beta, -alpha)
+            if value > best_value:
+                best_value = value
+                best_move = pos
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                self.pruned_nodes += 8 - i
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        _TRANSPOSITION_TABLE[key] = (best_value, flag, _SYMMETRIES[sym][best_move])
+        return best_value
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from ai.grid_search import quick_move, search_move
+from ai.minimax import MiniMaxAI
+from ai.solved_table import SolvedTable
+from models.board import STONE_O, STONE_X
+from models.game import Game
+
+logger = logging.getLogger(__name__)
+
+# Presupuesto por búsqueda en segundos (profundización iterativa)
+DEFAULT_TIME_BUDGET = 0.5
+# Búsquedas simultáneas en el pool; el resto espera turno
+DEFAULT_MAX_CONCURRENT = 4
+# Procesos del pool por worker de uvicorn (con --workers N hay N pools)
+DEFAULT_WORKERS = 2
+# Probabilidad de jugada al azar en dificultad media (igual que MiniMaxAI)
+MEDIUM_RANDOM_RATE = 0.3
+
+
+class AIService:
+    """Jugadas de la IA sin bloquear el event loop.
+
+    El triqui clásico se resuelve en el mismo loop: la tabla resuelta (o la
+    tabla de transposición) lo hace O(1). Los tableros grandes se buscan en
+    un pool de procesos con profundización iterativa y un presupuesto de
+    tiempo por jugada; si se agota, se usa la mejor jugada encontrada hasta
+    ese momento. Hay un máximo de búsquedas simultáneas, y consultas
+    idénticas en vuelo (mismo tablero y turno) comparten una sola búsqueda.
+
+    El pool se crea con la primera búsqueda: un worker que nunca ve un
+    tablero grande no arranca procesos. Con `workers=0` las búsquedas
+    corren en el loop (solo para comparar).
+    """
+
+    def __init__(self, solved_table: Optional[SolvedTable] = None,
+                 workers: Optional[int] = None,
+                 max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+                 time_budget: float = DEFAULT_TIME_BUDGET,
+                 rng: Optional[random.Random] = None):
+        self._rng = rng or random.Random()
+        self._minimax = MiniMaxAI(rng=self._rng, solved_table=solved_table)
+        self._workers = DEFAULT_WORKERS if workers is None else workers
+        self._executor: Optional[Executor] = None
+        self._closed = False
+        self.max_concurrent = max_concurrent
+        # Se crea en start(), dentro del loop que lo usa: en 3.9 un Semaphore
+        # queda ligado al loop vigente al construirlo
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.time_budget = time_budget
+        # Búsquedas en vuelo por posición, para compartirlas
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self.searches = 0
+        self.deduplicated = 0
+        self.fallbacks = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def start(self):
+        self._closed = False
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    def _pool(self) -> Optional[Executor]:
+        """Pool de procesos, creado con la primera búsqueda (None con workers=0)."""
+        if self._executor is None and self._workers and not self._closed:
+            logger.info(f"Iniciando pool de la IA con {self._workers} procesos")
+            self._executor = ProcessPoolExecutor(self._workers)
+        return self._executor
+
+    async def close(self):
+        self._closed = True
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def choose_move(self, game: Game, difficulty: str = "hard") -> int:
+        """Casilla que juega la IA por el jugador en turno de `game`."""
+        if game.grid is None:
+            if game.turn == "X":
+                return self._minimax.get_difficulty_move(game.x_bits, game.o_bits, difficulty)
+            return self._minimax.get_difficulty_move(game.o_bits, game.x_bits, difficulty)
+
+        if difficulty == "easy" or (difficulty == "medium"
+                                    and self._rng.random() < MEDIUM_RANDOM_RATE):
+            free = [i for i, cell in enumerate(game.grid.cells) if not cell]
+            return self._rng.choice(free)
+        stone = STONE_X if game.turn == "X" else STONE_O
+        key = (game.size, game.win_length, game.grid.to_string(), stone)
+        return await self.search(key)
+
+    async def search(self, key: Tuple) -> int:
+        """Búsqueda de la posición `key` (size, win_length, cells, stone), compartida."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_search(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.deduplicated += 1
+        # shield: si un solicitante se cancela, la búsqueda sigue para los demás
+        return await asyncio.shield(task)
+
+    async def _run_search(self, key: Tuple) -> int:
+        size, win_length, cells, stone = key
+        if self._semaphore is None:
+            raise RuntimeError("AIService.start() no fue llamado")
+        async with self._semaphore:
+            self.searches += 1
+            executor = self._pool()
+            if executor is None and not self._workers:
+                return search_move(size, win_length, cells, stone, self.time_budget)[0]
+            loop = asyncio.get_running_loop()
+            try:
+                if executor is None:
+                    raise RuntimeError("El servicio de la IA está cerrado")
+                move, depth = await loop.run_in_executor(
+                    executor, search_move, size, win_length, cells, stone, self.time_budget
+                )
+            except ValueError:
+                raise
+            except Exception as e:
+                # Pool caído o cerrado: jugar la mejor casilla según la heurística
+                logger.error(f"Búsqueda de la IA falló en el pool: {str(e)}")
+                self.fallbacks += 1
+                move = quick_move(size, win_length, cells, stone)
+                if move is None:
+                    raise ValueError("La partida ya terminó")
+                return move
+            logger.debug(f"IA: casilla {move} a profundidad {depth}")
+            return move
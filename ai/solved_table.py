@@ -0,0 +1,77 @@
+import logging
+import mmap
+import os
+import struct
+from typing import Optional, Tuple
+
+from models.game import FULL_BOARD
+
+logger = logging.getLogger(__name__)
+
+# Formato del archivo: cabecera (magic + número de entradas) seguida de una
+# entrada de 2 bytes por tablero en base 3 (casilla i: 0 vacía, 1 X, 2 O):
+# byte 0 = mejor casilla (NO_MOVE si la posición es terminal o inalcanzable)
+# byte 1 = valor con signo para el jugador en turno
+MAGIC = b"TTT1"
+HEADER = struct.Struct("<4sI")
+ENTRY_SIZE = 2
+NUM_POSITIONS = 3 ** 9
+NO_MOVE = 0xFF
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "solved_table.bin"
+)
+
+# Aportes de cada bitboard al índice en base 3, precalculados para O(1)
+_TERNARY_X = tuple(
+    sum(3 ** i for i in range(9) if bits >> i & 1) for bits in range(FULL_BOARD + 1)
+)
+_TERNARY_O = tuple(2 * v for v in _TERNARY_X)
+
+
+def board_index(x_bits: int, o_bits: int) -> int:
+    """Índice en base 3 del tablero dentro del archivo."""
+    return _TERNARY_X[x_bits] + _TERNARY_O[o_bits]
+
+
+class SolvedTable:
+    """Tabla de posiciones resueltas mapeada en memoria (solo lectura).
+
+    Al usar mmap, todos los workers de uvicorn comparten las mismas páginas
+    del page cache y abrir la tabla no cuesta nada en tiempo ni memoria propia.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or count != NUM_POSITIONS:
+            self._mmap.close()
+            raise ValueError(f"Tabla de posiciones inválida: {path}")
+
+    def lookup(self, x_bits: int, o_bits: int) -> Optional[Tuple[int, int]]:
+        """Retorna (mejor casilla, valor) para el jugador en turno, o None."""
+        offset = HEADER.size + board_index(x_bits, o_bits) * ENTRY_SIZE
+        move = self._mmap[offset]
+        if move == NO_MOVE:
+            return None
+        value = self._mmap[offset + 1]
+        return move, value - 256 if value > 127 else value
+
+    def close(self):
+        self._mmap.close()
+
+
+def load_solved_table(path: str = DEFAULT_PATH) -> Optional[SolvedTable]:
+    """Abre la tabla si existe; sin ella la IA recurre a la búsqueda."""
+    try:
+        return SolvedTable(path)
+    except FileNotFoundError:
+        logger.warning(
+            f"No se encontró {path}; ejecute tools/build_solved_table.py. "
+            "La IA usará búsqueda Minimax."
+        )
+    except ValueError as e:
+        logger.error(str(e))
+    return None
@@ -90,6 +90,9 @@ function handleWSMessage(msg) {
     if (msg.type === "registered") {
         playerId = msg.playerId;
         $("playerId").value = playerId;
+        // Token para reanudar la sesión si se cae la conexión
+        localStorage.setItem("triqui-token-" + playerId, msg.token);
+        localStorage.setItem("triqui-player-key", msg.playerKey);
         log("Registrado playerId: " + playerId);
         return;
     }
@@ -131,6 +134,12 @@ function handleWSMessage(msg) {
         return;
     }
 
+    // Varias líneas agrupadas (ráfagas) o historial al reconectar
+    if (msg.type === "chat_batch" || msg.type === "chat_history") {
+        msg.messages.forEach(m => addChatMessage(m.sender, m.message));
+        return;
+    }
+
     if (msg.type === "timeout") {
         log("Timeout: " + msg.message);
         $("turnInfo").innerText = msg.message;
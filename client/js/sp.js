@@ -22,7 +22,8 @@ class SinglePlayerGame {
         try {
             const response = await fetch("/api/single-player/game", {
                 method: "POST",
-                headers: { "Content-Type": "application/json" }
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ difficulty })
             });
             
             if (!response.ok) {
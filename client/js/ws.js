@@ -4,9 +4,13 @@ symbol = null;
 gameId = null;
 myTurn = false;
 board = [["-","-","-"],["-","-","-"],["-","-","-"]];
+// Reintentos de reanudación tras un corte (backoff exponencial)
+resumeAttempts = 0;
+const MAX_RESUME_ATTEMPTS = 5;
 
 function connectWS(type) {
-    ws = new WebSocket("ws://localhost:8000/ws");
+    const socket = new WebSocket("ws://localhost:8000/ws");
+    ws = socket;
 
     ws.onopen = () => {
         log("Conexión abierta");
@@ -14,11 +18,14 @@ function connectWS(type) {
 
         let payload = {
             type,
-            playerName: name
+            playerName: name,
+            // Identidad estable entre sesiones (estadísticas y ranking)
+            playerKey: localStorage.getItem("triqui-player-key")
         };
 
         if (type === "resume") {
             payload.playerId = $("playerId").value.trim();
+            payload.token = localStorage.getItem("triqui-token-" + payload.playerId);
         }
 
         ws.send(JSON.stringify(payload));
@@ -26,14 +33,28 @@ function connectWS(type) {
 
     ws.onmessage = (event) => {
         const msg = JSON.parse(event.data);
+        // Heartbeat del servidor: responder de inmediato
+        if (msg.type === "ping") {
+            ws.send(JSON.stringify({ type: "pong" }));
+            return;
+        }
+        if (msg.type === "registered") resumeAttempts = 0;
         console.log(msg);
         handleWSMessage(msg);
     };
 
-    ws.onclose = () => {
+    ws.onclose = (event) => {
+        // Un socket reemplazado por una reanudación ya no es el actual
+        if (ws !== socket) return;
         log("Conexión cerrada");
         $("status").innerText = "Desconectado";
         blockBoard();
+        // Corte de red: reanudar la misma sesión (misma partida) con backoff
+        if (playerId && !event.wasClean && resumeAttempts < MAX_RESUME_ATTEMPTS) {
+            const delay = Math.min(500 * 2 ** resumeAttempts, 8000);
+            resumeAttempts++;
+            setTimeout(() => connectWS("resume"), delay);
+        }
     };
 }
 
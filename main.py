@@ -1,11 +1,101 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple, Union
+
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+from ai.solved_table import DEFAULT_PATH, load_solved_table
 from models.game_manager import GameManager
+from models.move_log import MoveLog
+from models.player_stats import StatsStore
+from models.player import BackpressurePolicy, DEFAULT_SEND_QUEUE_SIZE, PlayerConnection
+from models.state_backend import InMemoryBackend, SQLiteBackend
+from utils.admission import AdmissionLimiter
+from utils.logging_setup import LogSampler, setup_logging
+from utils.rate_limiter import ThrottleAction
+import utils.message_types as mt
 import logging
 
-logging.basicConfig(level=logging.INFO)
+# Handler de logs basado en cola: la escritura ocurre en un hilo aparte
+log_listener = setup_logging(getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper()))
+logger = logging.getLogger(__name__)
+
+
+def _create_backend():
+    """memory: un solo worker. sqlite: estado compartido entre varios workers."""
+    if os.getenv("STATE_BACKEND", "memory") == "sqlite":
+        return SQLiteBackend(os.getenv("STATE_DB_PATH", "data/state.db"))
+    return InMemoryBackend()
+
+
+def _create_move_log():
+    """Log de movimientos para sobrevivir a reinicios (deshabilitado si no se configura)."""
+    directory = os.getenv("MOVE_LOG_DIR")
+    if not directory:
+        return None
+    return MoveLog(directory, flush_interval=float(os.getenv("MOVE_LOG_FLUSH_INTERVAL", "0.05")))
+
+
+session_secret = os.getenv("SESSION_SECRET") or None
+if not session_secret:
+    logger.warning("Sin SESSION_SECRET: las estadísticas de jugadores no se guardan en disco")
+
+# La tabla de posiciones resueltas se mapea en memoria una sola vez al arrancar
+manager = GameManager(
+    solved_table=load_solved_table(os.getenv("SOLVED_TABLE_PATH", DEFAULT_PATH)),
+    send_queue_size=int(os.getenv("SEND_QUEUE_SIZE", DEFAULT_SEND_QUEUE_SIZE)),
+    backpressure_policy=BackpressurePolicy(os.getenv("BACKPRESSURE_POLICY", "drop_oldest")),
+    backend=_create_backend(),
+    move_log=_create_move_log(),
+    snapshot_interval=float(os.getenv("SNAPSHOT_INTERVAL", "60")),
+    throttle_action=ThrottleAction(os.getenv("THROTTLE_ACTION", "drop")),
+    heartbeat_interval=float(os.getenv("HEARTBEAT_INTERVAL", "15")),
+    heartbeat_max_missed=int(os.getenv("HEARTBEAT_MAX_MISSED", "3")),
+    spectator_shards=int(os.getenv("SPECTATOR_SHARDS", "4")),
+    chat_history_size=int(os.getenv("CHAT_HISTORY_SIZE", "50")),
+    chat_coalesce_window=float(os.getenv("CHAT_COALESCE_WINDOW", "0")),
+    # Sin AI_WORKERS: 2 procesos, creados con la primera búsqueda; 0 las ejecuta en el loop
+    ai_workers=int(os.environ["AI_WORKERS"]) if os.getenv("AI_WORKERS") else None,
+    ai_max_concurrent=int(os.getenv("AI_MAX_CONCURRENT", "4")),
+    ai_time_budget=float(os.getenv("AI_TIME_BUDGET", "0.5")),
+    single_player_ttl=float(os.getenv("SINGLE_PLAYER_TTL", "1800")),
+    max_single_player_games=int(os.getenv("SINGLE_PLAYER_MAX_GAMES", "10000")),
+    # Sin SESSION_SECRET los tokens de reanudación y las claves de jugador valen
+    # solo hasta reiniciar: las estadísticas quedan en memoria, no se persisten
+    # filas que nadie podría volver a reclamar
+    stats=StatsStore(os.getenv("STATS_DB_PATH", "data/stats.db") if session_secret else None,
+                     flush_interval=float(os.getenv("STATS_FLUSH_INTERVAL", "1.0"))),
+    session_secret=session_secret,
+    resume_requires_token=os.getenv("SESSION_REQUIRE_TOKEN", "1") != "0",
+)
+
+# Cupo de handshakes simultáneos y muestreo del log de conexiones (nivel DEBUG)
+admission = AdmissionLimiter(
+    max_concurrent=int(os.getenv("WS_MAX_HANDSHAKES", "256")),
+    timeout=float(os.getenv("WS_ADMISSION_TIMEOUT", "2.0")),
+)
+connection_log_sample = LogSampler(int(os.getenv("WS_LOG_SAMPLE_EVERY", "100")))
+# Segundos que se espera el primer frame (join/resume) tras el accept
+handshake_timeout = float(os.getenv("WS_HANDSHAKE_TIMEOUT", "5.0"))
+manager.metrics.gauge("handshakes_in_flight", "Handshakes de websocket en curso",
+                      lambda: admission.in_flight)
+manager.metrics.gauge("handshakes_rejected", "Handshakes rechazados por el límite de admisión",
+                      lambda: admission.rejected)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    admission.start()
+    await manager.start()
+    yield
+    await manager.close()
+    log_listener.stop()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Para desarrollo: permitir orígenes. En producción restringir a orígenes confiables.
 app.add_middleware(
@@ -16,39 +106,217 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-manager = GameManager()
 
+class SinglePlayerConfig(BaseModel):
+    difficulty: str = "hard"
+    size: int = 3  # Lado del tablero (3 = triqui clásico)
+    win_length: Optional[int] = None  # Fichas en línea para ganar (por defecto, el lado)
 
-@app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    # Log para depuración: cabeceras y origen
-    logging.info("Attempting websocket connection")
+
+class SinglePlayerMove(BaseModel):
+    # sp.js envía [fila, columna]; también se acepta el índice fila * lado + columna
+    position: Union[int, List[int]]
+
+
+def _error(status_code: int, message: str) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"message": message})
+
+
+@app.post("/api/single-player/game")
+async def create_single_player_game(config: Optional[SinglePlayerConfig] = None):
     try:
-        headers = dict(websocket.headers)
-        logging.info(f"Headers: {headers}")
-        logging.info(f"Origin header: {websocket.headers.get('origin')}")
-    except Exception:
-        # Fallback si headers no se pueden leer directamente
-        try:
-            headers = {k.decode(): v.decode() for k, v in websocket.scope.get("headers", [])}
-            logging.info(f"Headers fallback: {headers}")
-        except Exception:
-            logging.info("No se pudieron leer cabeceras de websocket")
+        config = config or SinglePlayerConfig()
+        return await manager.create_single_player_game(
+            config.difficulty, config.size, config.win_length
+        )
+    except ValueError as e:
+        return _error(400, str(e))
+
+
+@app.post("/api/single-player/{game_id}/move")
+async def single_player_move(game_id: str, move: SinglePlayerMove):
+    size = manager.single_player_board_size(game_id)
+    if size is None:
+        return _error(404, "Partida no encontrada")
+    position = move.position
+    if isinstance(position, list):
+        if len(position) != 2 or not all(0 <= v < size for v in position):
+            return _error(400, "Posición inválida")
+        position = position[0] * size + position[1]
+    try:
+        return await manager.handle_single_player_move(game_id, position)
+    except KeyError:
+        return _error(404, "Partida no encontrada")
+    except ValueError as e:
+        return _error(400, str(e))
+
+
+@app.post("/api/single-player/{game_id}/reset")
+async def single_player_reset(game_id: str):
+    try:
+        return await manager.reset_single_player_game(game_id)
+    except KeyError:
+        return _error(404, "Partida no encontrada")
+
 
+@app.post("/api/single-player/{game_id}/reset-match")
+async def single_player_reset_match(game_id: str):
+    try:
+        return await manager.reset_single_player_match(game_id)
+    except KeyError:
+        return _error(404, "Partida no encontrada")
+
+
+@app.get("/api/matchmaking/stats")
+async def matchmaking_stats():
+    return manager.matchmaking_stats()
+
+
+@app.get("/api/games")
+async def list_games(limit: int = 20):
+    return manager.list_games(limit)
+
+
+@app.get("/api/leaderboard")
+async def leaderboard(limit: int = 10):
+    return manager.leaderboard(min(max(limit, 1), 100))
+
+
+# El id es el estable del jugador: el de su playerKey (antes del punto), el
+# mismo "id" que muestra el ranking
+@app.get("/api/players/{player_id}/stats")
+async def player_stats(player_id: str):
+    stats = manager.player_stats(player_id)
+    if stats is None:
+        return _error(404, "Jugador sin partidas registradas")
+    return stats
+
+
+@app.get("/metrics")
+async def metrics():
+    # Formato de texto de Prometheus
+    return PlainTextResponse(manager.metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+async def _open_session(
+        websocket: WebSocket) -> Optional[Tuple[PlayerConnection, Optional[dict]]]:
+    """Espera el primer frame y registra o reanuda al jugador.
+
+    Retorna el jugador y el primer frame (None si no llegó), o None si el
+    cliente se fue antes de mandarlo.
+    """
+    # Parámetros opcionales: ?protocol=delta para recibir solo deltas y
+    # ?region=...&rating=... para emparejar dentro del mismo bucket
+    params = websocket.query_params
+    delta_mode = params.get("protocol") == "delta"
+    # Primer frame: {"type": "join", "playerName"} o {"type": "resume", "playerId", "token"}.
+    # Sin él (clientes viejos) se registra un jugador nuevo igual que antes
+    try:
+        first = await asyncio.wait_for(websocket.receive_json(), handshake_timeout)
+    except asyncio.TimeoutError:
+        first = None
+    except (WebSocketDisconnect, ValueError, KeyError, TypeError, RuntimeError):
+        return None
+    if not isinstance(first, dict):
+        first = None
+    first_type = first.get("type") if first else None
+
+    player = None
+    if first_type == mt.MessageType.RESUME.value:
+        # Cambio de red: se reutiliza la conexión del jugador en lugar de crear otra
+        player = await manager.resume_player(
+            websocket, first.get("playerId"), first.get("token"), delta_mode,
+            first.get("playerKey")
+        )
+        if player is None:
+            await websocket.send_json({
+                "type": mt.MessageType.ERROR.value,
+                "message": "No se pudo reanudar la sesión; se inicia una nueva"
+            })
+    if player is None:
+        rating = params.get("rating")
+        bucket = manager.matchmaking_bucket(
+            region=params.get("region"),
+            rating=int(rating) if rating and rating.isdigit() else None
+        )
+        player = await manager.connect_player(
+            websocket, first.get("playerName") if first else None,
+            delta_mode=delta_mode, bucket=bucket,
+            player_key=first.get("playerKey") if first else None
+        )
+    return player, first
+
+
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    # Admisión: si hay demasiados handshakes en curso, rechazar antes del accept
+    # (el cliente reintenta con backoff). El cupo cubre todo el handshake: el
+    # accept, la espera del primer frame y el registro o la reanudación
+    if not await admission.acquire():
+        await websocket.close(code=1013)
+        return
     try:
         await websocket.accept()
-        logging.info("Accepted websocket connection from client")
-    except Exception as e:
-        logging.exception("Accept failed")
-        # Re-raise para que Uvicorn/Starlette maneje el cierre correctamente
-        raise
+        session = await _open_session(websocket)
+    finally:
+        admission.release()
+    if session is None:
+        return
+    player, first = session
+    first_type = first.get("type") if first else None
 
-    player = await manager.connect_player(websocket)
+    # Log muestreado: solo se formatea una de cada N conexiones
+    if logger.isEnabledFor(logging.DEBUG) and connection_log_sample():
+        logger.debug(f"ws conectado player={player.id} origin={websocket.headers.get('origin')} "
+                     f"in_flight={admission.in_flight} rejected={admission.rejected}")
     try:
-        while True:
-            data = await websocket.receive_json()
+        # Cliente viejo: su primer frame ya era un mensaje del juego
+        if first_type not in (None, mt.MessageType.JOIN.value, mt.MessageType.RESUME.value):
+            await manager.handle_message(player, first)
+        # El servidor también puede cerrar la conexión (límite de frames, cola
+        # desbordada) y una reanudación puede pasar el jugador a otro socket
+        while player.connected and player.websocket is websocket:
+            try:
+                data = await websocket.receive_json()
+            except (ValueError, KeyError, TypeError):
+                # Frame binario o que no es JSON: se trata como mensaje inválido
+                # (cuenta para el límite y responde con error) y se sigue
+                data = None
+            except RuntimeError:
+                # WebSocketDisconnected: el socket ya se cerró tras fallar un envío
+                break
             await manager.handle_message(player, data)
     except WebSocketDisconnect:
-        await manager.disconnect_player(player)
+        pass
+    finally:
+        await manager.disconnect_player(player, websocket)
+
+
+@app.websocket("/ws/spectate/{game_id}")
+async def spectate_endpoint(websocket: WebSocket, game_id: str):
+    # Solo lectura: recibe el estado de la partida; lo que envíe el cliente se ignora
+    if not await admission.acquire():
+        await websocket.close(code=1013)
+        return
+    # Como en /ws, el cupo se libera recién con el espectador suscrito (o rechazado)
+    try:
+        await websocket.accept()
+        spectator = await manager.add_spectator(websocket, game_id)
+        if spectator is None:
+            await websocket.close(code=4404)
+            return
+    finally:
+        admission.release()
+    try:
+        # Cualquier frame (texto o binario) se descarta hasta el cierre
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    except RuntimeError:
+        # El servidor ya cerró el socket (espectador lento o partida terminada)
+        pass
+    finally:
+        manager.remove_spectator(spectator)
+
+
 # Nota: cualquier snippet de cliente (JavaScript) debe colocarse en archivos estáticos
 # o en la consola del navegador. No incluir código JS en este archivo Python.
\ No newline at end of file
@@ -0,0 +1,111 @@
+from typing import List, Optional
+
+# Valor de cada casilla en `Board.cells`
+EMPTY = 0
+STONE_X = 1
+STONE_O = 2
+
+# Símbolo de cada valor al serializar (índice = valor de la casilla)
+SYMBOLS = "-XO"
+_TO_SYMBOLS = bytes.maketrans(b"\x00\x01\x02", SYMBOLS.encode())
+_FROM_SYMBOLS = bytes.maketrans(SYMBOLS.encode(), b"\x00\x01\x02")
+
+# Direcciones de las líneas (fila, columna): horizontal, vertical y diagonales
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class Board:
+    """Tablero N×N de "k en línea" con detección incremental de victoria.
+
+    Las casillas viven en un bytearray (posición = fila * size + columna).
+    Al colocar una ficha solo se revisan las cuatro líneas que pasan por
+    ella, hasta `win_length - 1` casillas a cada lado: el costo por
+    movimiento es O(k) sin importar el tamaño del tablero.
+    """
+
+    __slots__ = ("size", "win_length", "cells", "moves_count")
+
+    def __init__(self, size: int = 3, win_length: Optional[int] = None):
+        win_length = win_length or size
+        if size < 1 or not 1 <= win_length <= size:
+            raise ValueError(f"Tablero inválido: {size}x{size} con {win_length} en línea")
+        self.size = size
+        self.win_length = win_length
+        self.cells = bytearray(size * size)
+        self.moves_count = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.cells)
+
+    @property
+    def is_full(self) -> bool:
+        return self.moves_count == len(self.cells)
+
+    def is_empty(self, position: int) -> bool:
+        """Indica si la posición existe y está libre."""
+        return 0 <= position < len(self.cells) and not self.cells[position]
+
+    def place(self, position: int, stone: int) -> bool:
+        """Coloca la ficha (la posición debe estar libre); retorna True si gana."""
+        self.cells[position] = stone
+        self.moves_count += 1
+        return self.wins_at(position)
+
+    def remove(self, position: int):
+        """Retira una ficha (para búsquedas que deshacen movimientos)."""
+        self.cells[position] = EMPTY
+        self.moves_count -= 1
+
+    def wins_at(self, position: int) -> bool:
+        """Indica si la ficha en `position` forma una línea de `win_length`."""
+        cells = self.cells
+        size = self.size
+        need = self.win_length
+        stone = cells[position]
+        if not stone:
+            return False
+        row, col = divmod(position, size)
+        for dr, dc in DIRECTIONS:
+            step = dr * size + dc
+            count = 1
+            # Hacia adelante
+            r, c, p = row + dr, col + dc, position + step
+            while count < need and 0 <= r < size and 0 <= c < size and cells[p] == stone:
+                count += 1
+                r += dr
+                c += dc
+                p += step
+            # Hacia atrás
+            r, c, p = row - dr, col - dc, position - step
+            while count < need and 0 <= r < size and 0 <= c < size and cells[p] == stone:
+                count += 1
+                r -= dr
+                c -= dc
+                p -= step
+            if count >= need:
+                return True
+        return False
+
+    def clear(self):
+        self.cells = bytearray(len(self.cells))
+        self.moves_count = 0
+
+    def rows(self) -> List[List[str]]:
+        """Tablero como filas de "-", "X" y "O" (formato de los mensajes JSON)."""
+        text = self.to_string()
+        size = self.size
+        return [list(text[i:i + size]) for i in range(0, len(text), size)]
+
+    def to_string(self) -> str:
+        """Casillas como texto compacto ("-", "X", "O") para persistir."""
+        return self.cells.translate(_TO_SYMBOLS).decode()
+
+    @classmethod
+    def from_string(cls, text: str, size: int, win_length: Optional[int] = None) -> "Board":
+        board = cls(size, win_length)
+        if len(text) != len(board.cells):
+            raise ValueError("El texto no corresponde al tamaño del tablero")
+        board.cells = bytearray(text.encode().translate(_FROM_SYMBOLS))
+        board.moves_count = len(board.cells) - board.cells.count(EMPTY)
+        return board
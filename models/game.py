@@ -1,120 +1,218 @@
-from typing import List, Optional, Dict, Tuple
-from .player import PlayerConnection as Player
+from typing import List, Optional, Dict
+
+from models.board import STONE_O, STONE_X, Board
+from utils.ids import new_id
+
+# Cada lado se guarda como un entero de 9 bits: el bit i es la casilla
+# i = fila * 3 + columna.
+FULL_BOARD = 0b111111111
+
+# Máscaras de las 8 líneas ganadoras (filas, columnas y diagonales)
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# WINNING_BITS[bits] indica si un conjunto de casillas contiene una línea.
+# Se precalcula una sola vez para que la detección de victoria sea O(1).
+WINNING_BITS = tuple(
+    any(bits & mask == mask for mask in WIN_MASKS)
+    for bits in range(FULL_BOARD + 1)
+)
+
+
+def bits_to_board(x_bits: int, o_bits: int) -> List[List[str]]:
+    """Convierte los bitboards al tablero 3x3 que se envía en los mensajes JSON."""
+    cells = [
+        "X" if x_bits >> i & 1 else "O" if o_bits >> i & 1 else "-"
+        for i in range(9)
+    ]
+    return [cells[0:3], cells[3:6], cells[6:9]]
+
 
 class Game:
-    def __init__(self, game_id: str, player_x: Player, player_o: Player):
-        self.game_id = game_id
-        self.player_x = player_x
-        self.player_o = player_o
-        self.board = [["-" for _ in range(3)] for _ in range(3)]
+    """Partida de triqui representada con un bitboard por jugador.
+
+    Con `size`/`win_length` distintos de 3 (p. ej. 15x15 con 5 en línea) el
+    estado vive en un `Board` y la victoria se detecta incrementalmente;
+    el triqui clásico conserva los bitboards que usan la IA y la tabla resuelta.
+    """
+
+    __slots__ = (
+        "id", "player_x", "player_o", "x_bits", "o_bits", "turn",
+        "wins", "finished", "winner", "moves_count", "seq",
+        "size", "win_length", "grid",
+    )
+
+    def __init__(self, game_id: Optional[str] = None,
+                 player_x: Optional[str] = None, player_o: Optional[str] = None,
+                 size: int = 3, win_length: Optional[int] = None):
+        self.id = game_id or new_id()
+        self.player_x = player_x  # ID del jugador X
+        self.player_o = player_o  # ID del jugador O
+        self.size = size
+        self.win_length = win_length or size
+        # Tablero genérico; None en el triqui clásico (bitboards)
+        self.grid: Optional[Board] = (
+            None if size == 3 and self.win_length == 3 else Board(size, self.win_length)
+        )
+        self.x_bits = 0
+        self.o_bits = 0
         self.turn = "X"
         self.wins = {"X": 0, "O": 0}
         self.finished = False
-        self.winner = None
+        self.winner: Optional[str] = None  # Símbolo del ganador de la ronda
         self.moves_count = 0
+        self.seq = 0  # Número de secuencia de cada cambio de estado (deltas)
+
+    @property
+    def game_id(self) -> str:
+        return self.id
+
+    @property
+    def board(self) -> List[List[str]]:
+        """Tablero con "-", "X" y "O"; solo se construye al serializar."""
+        if self.grid is not None:
+            return self.grid.rows()
+        return bits_to_board(self.x_bits, self.o_bits)
+
+    @property
+    def current_player(self) -> Optional[str]:
+        """ID del jugador que tiene el turno."""
+        return self.player_x if self.turn == "X" else self.player_o
 
-    def get_player_symbol(self, player: Player) -> Optional[str]:
+    @property
+    def is_draw(self) -> bool:
+        return self.finished and self.winner is None
+
+    def get_player_symbol(self, player_id: str) -> Optional[str]:
         """Retorna el símbolo (X/O) del jugador"""
-        if player == self.player_x:
+        if player_id == self.player_x:
             return "X"
-        elif player == self.player_o:
+        elif player_id == self.player_o:
             return "O"
         return None
 
-    def is_valid_move(self, row: int, col: int) -> bool:
+    def is_valid_move(self, position: int) -> bool:
         """Verifica si el movimiento es válido"""
+        if self.grid is not None:
+            return not self.finished and self.grid.is_empty(position)
         return (
-            0 <= row < 3 
-            and 0 <= col < 3 
-            and self.board[row][col] == "-"
+            0 <= position < 9
+            and not (self.x_bits | self.o_bits) >> position & 1
             and not self.finished
         )
 
     def check_winner(self) -> Optional[str]:
         """Verifica si hay un ganador y retorna su símbolo"""
-        # Revisar filas
-        for row in self.board:
-            if row[0] != "-" and row[0] == row[1] == row[2]:
-                return row[0]
-
-        # Revisar columnas
-        for col in range(3):
-            if (self.board[0][col] != "-" 
-                and self.board[0][col] == self.board[1][col] == self.board[2][col]):
-                return self.board[0][col]
-
-        # Revisar diagonales
-        if (self.board[0][0] != "-" 
-            and self.board[0][0] == self.board[1][1] == self.board[2][2]):
-            return self.board[0][0]
-        
-        if (self.board[0][2] != "-" 
-            and self.board[0][2] == self.board[1][1] == self.board[2][0]):
-            return self.board[0][2]
-
+        if self.grid is not None:
+            # En tableros grandes la victoria se detecta al mover
+            return self.winner
+        if WINNING_BITS[self.x_bits]:
+            return "X"
+        if WINNING_BITS[self.o_bits]:
+            return "O"
         return None
 
-    async def make_move(self, player: Player, row: int, col: int) -> Dict:
-        """Realiza un movimiento y retorna el resultado"""
-        # Validar el movimiento
-        player_symbol = self.get_player_symbol(player)
-        if not player_symbol:
-            return {"error": "No eres parte de este juego"}
-        
-        if player_symbol != self.turn:
-            return {"error": "No es tu turno"}
-        
-        if not self.is_valid_move(row, col):
-            return {"error": "Movimiento inválido"}
-
-        # Realizar el movimiento
-        self.board[row][col] = player_symbol
-        self.moves_count += 1
+    def make_move(self, position: int) -> bool:
+        """Coloca la ficha del jugador en turno; retorna False si no es válido."""
+        if not self.is_valid_move(position):
+            return False
 
-        # Verificar si hay ganador
-        winner = self.check_winner()
-        is_draw = self.moves_count == 9
+        if self.grid is not None:
+            # Solo se revisan las líneas que pasan por la nueva ficha
+            won = self.grid.place(position, STONE_X if self.turn == "X" else STONE_O)
+        else:
+            bit = 1 << position
+            if self.turn == "X":
+                self.x_bits |= bit
+                won = WINNING_BITS[self.x_bits]
+            else:
+                self.o_bits |= bit
+                won = WINNING_BITS[self.o_bits]
+        self.moves_count += 1
 
-        # Actualizar estado del juego
-        if winner:
-            self.winner = winner
-            self.wins[winner] += 1
+        # Solo el jugador que acaba de mover puede haber ganado
+        if won:
+            self.winner = self.turn
+            self.wins[self.turn] += 1
             self.finished = True
-        elif is_draw:
+        elif self.moves_count == self.size * self.size:
             self.finished = True
 
         # Cambiar turno
         self.turn = "O" if self.turn == "X" else "X"
+        self.seq += 1
+        return True
 
-        # Preparar respuesta
-        return {
-            "type": "move",
-            "success": True,
-            "board": self.board,
-            "turn": self.turn,
-            "finished": self.finished,
-            "winner": self.winner,
-            "is_draw": is_draw and not winner,
-            "wins": self.wins
-        }
-
-    def reset_board(self):
-        """Reinicia el tablero para una nueva partida"""
-        self.board = [["-" for _ in range(3)] for _ in range(3)]
+    def reset(self):
+        """Reinicia el tablero para una nueva ronda (conserva las victorias)"""
+        self.x_bits = 0
+        self.o_bits = 0
+        if self.grid is not None:
+            self.grid.clear()
         self.turn = "X"
         self.finished = False
         self.winner = None
         self.moves_count = 0
+        self.seq += 1
+
+    def reset_match(self):
+        """Reinicia la serie completa, incluyendo el contador de victorias"""
+        self.reset()
+        self.wins = {"X": 0, "O": 0}
 
     def get_game_state(self) -> Dict:
         """Retorna el estado actual del juego"""
         return {
-            "game_id": self.game_id,
+            "game_id": self.id,
             "board": self.board,
             "turn": self.turn,
             "finished": self.finished,
             "winner": self.winner,
             "wins": self.wins,
-            "player_x": self.player_x.name,
-            "player_o": self.player_o.name
-        }
\ No newline at end of file
+            "seq": self.seq,
+            "size": self.size,
+            "win_length": self.win_length,
+            "player_x": self.player_x,
+            "player_o": self.player_o
+        }
+
+    def to_dict(self) -> Dict:
+        """Representación compacta para persistir o compartir entre procesos"""
+        data = {
+            "id": self.id,
+            "player_x": self.player_x,
+            "player_o": self.player_o,
+            "x": self.x_bits,
+            "o": self.o_bits,
+            "turn": self.turn,
+            "wins": self.wins,
+            "finished": self.finished,
+            "winner": self.winner,
+            "moves_count": self.moves_count,
+            "seq": self.seq
+        }
+        if self.grid is not None:
+            data["size"] = self.size
+            data["win_length"] = self.win_length
+            data["cells"] = self.grid.to_string()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Game":
+        """Reconstruye una partida a partir de `to_dict`"""
+        game = cls(data["id"], data["player_x"], data["player_o"],
+                   data.get("size", 3), data.get("win_length"))
+        if game.grid is not None:
+            game.grid = Board.from_string(data["cells"], game.size, game.win_length)
+        game.x_bits = data["x"]
+        game.o_bits = data["o"]
+        game.turn = data["turn"]
+        game.wins = dict(data["wins"])
+        game.finished = data["finished"]
+        game.winner = data["winner"]
+        game.moves_count = data["moves_count"]
+        game.seq = data["seq"]
+        return game
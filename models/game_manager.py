@@ -1,120 +1,715 @@
-from typing import Dict, Optional
+from typing import Dict, Hashable, Optional, Tuple
 import logging
 import asyncio
-from uuid import uuid4
+import functools
+import time
+from collections import OrderedDict
 
+from ai.minimax import AIPlayer
+from ai.service import DEFAULT_MAX_CONCURRENT, DEFAULT_TIME_BUDGET, AIService
+from ai.solved_table import SolvedTable
 from models.game import Game
-from models.player import PlayerConnection
+from models.matchmaking import MatchmakingQueue
+from models.move_log import MoveLog
+from models.spectators import Spectator, SpectatorHub
+from models.player_stats import StatsStore, is_ranked
+from models.player import (BackpressurePolicy, DEFAULT_SEND_QUEUE_SIZE, FrameKind,
+                           PlayerConnection)
+from models.state_backend import InMemoryBackend, StateBackend
 import utils.message_types as mt
+from utils.ids import new_id
+from utils.json_codec import encode_message
+from utils.message_schema import MESSAGE_SCHEMAS
+from utils.metrics import Registry
+from utils.rate_limiter import ThrottleAction, TokenBucketLimiter
+from utils.session_token import SessionSigner
+from utils.ring_buffer import RingBuffer
+from utils.timer_wheel import TimerWheel
 
 logger = logging.getLogger(__name__)
 
+# Victorias necesarias para ganar la serie (best-of-5)
+MATCH_WINS = 3
+DIFFICULTIES = ("easy", "medium", "hard")
+# Lado máximo del tablero en partidas contra la IA (p. ej. 15x15 con 5 en línea)
+MAX_BOARD_SIZE = 19
+# Largo máximo del nombre que envía el cliente al unirse
+MAX_PLAYER_NAME = 32
+# Segundos que se espera a que un jugador desconectado vuelva antes de limpiarlo
+CLEANUP_DELAY = 300
+# Partidas contra la IA: segundos sin uso antes de descartarlas y máximo en memoria
+SINGLE_PLAYER_TTL = 1800
+MAX_SINGLE_PLAYER_GAMES = 10000
+# Segundos entre snapshots del log de movimientos
+SNAPSHOT_INTERVAL = 60
+# Heartbeat: segundos entre pings y latidos sin respuesta antes de desalojar
+HEARTBEAT_INTERVAL = 15
+HEARTBEAT_MAX_MISSED = 3
+# Peso de cada muestra nueva en el RTT suavizado
+RTT_SMOOTHING = 0.2
+# Líneas de chat que se guardan por partida para reenviar al reconectar (0 = sin historial)
+CHAT_HISTORY_SIZE = 50
+# Presupuesto por tipo de mensaje: (ráfaga máxima, frames por segundo sostenidos);
+# "invalid" cubre los tipos desconocidos
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    "move": (10, 5.0),
+    "game_reset": (3, 1.0),
+    "chat_message": (5, 1.0),
+    "sync": (5, 1.0),
+    "pong": (5, 1.0),
+    "invalid": (5, 1.0),
+}
+
 class GameManager:
     """Gestiona las conexiones de jugadores y las partidas."""
     
-    def __init__(self):
+    def __init__(self, solved_table: Optional[SolvedTable] = None,
+                 send_queue_size: int = DEFAULT_SEND_QUEUE_SIZE,
+                 backpressure_policy: BackpressurePolicy = BackpressurePolicy.DROP_OLDEST,
+                 backend: Optional[StateBackend] = None,
+                 matchmaking: Optional[MatchmakingQueue] = None,
+                 matchmaking_interval: float = 0.05,
+                 move_log: Optional[MoveLog] = None,
+                 snapshot_interval: float = SNAPSHOT_INTERVAL,
+                 rate_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 throttle_action: ThrottleAction = ThrottleAction.DROP,
+                 heartbeat_interval: float = HEARTBEAT_INTERVAL,
+                 heartbeat_max_missed: int = HEARTBEAT_MAX_MISSED,
+                 spectator_shards: int = 4,
+                 chat_history_size: int = CHAT_HISTORY_SIZE,
+                 chat_coalesce_window: float = 0.0,
+                 ai_workers: Optional[int] = None,
+                 ai_max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+                 ai_time_budget: float = DEFAULT_TIME_BUDGET,
+                 stats: Optional[StatsStore] = None,
+                 session_secret: Optional[str] = None,
+                 resume_requires_token: bool = True,
+                 single_player_ttl: float = SINGLE_PLAYER_TTL,
+                 max_single_player_games: int = MAX_SINGLE_PLAYER_GAMES):
         """Inicializa el gestor de juegos."""
-        self._players: Dict[str, PlayerConnection] = {}  # player_id -> PlayerConnection
-        self.games: Dict[str, Game] = {}  # game_id -> Game
-        self._waiting_player: Optional[str] = None  # ID del jugador en espera
-        self._cleanup_tasks = {}  # Tareas de limpieza por jugador
-        
-    async def register_player(self, websocket, name: str) -> PlayerConnection:
-        """Registra un nuevo jugador."""
-        player_id = str(uuid4())
-        player = PlayerConnection(player_id, name, websocket)
-        self._players[player_id] = player
-        logger.info(f"Jugador registrado: {name} ({player_id})")
+        self._players: Dict[str, PlayerConnection] = {}  # Jugadores conectados a este worker
+        self.games: Dict[str, Game] = {}  # game_id -> Game (caché local)
+        # Un lock por partida: los cambios de una misma partida se aplican y se
+        # difunden en orden, y partidas distintas no se esperan entre sí
+        self._game_locks: Dict[str, asyncio.Lock] = {}
+        # Estado compartido entre workers (partidas, espera, mensajes remotos)
+        self._backend = backend or InMemoryBackend()
+        self._backend.on_deliver = self._deliver_remote
+        # Cola de emparejamiento local; se procesa por lotes en cada tick
+        self._matchmaking = matchmaking if matchmaking is not None else MatchmakingQueue()
+        self._matchmaking_interval = matchmaking_interval
+        self._matchmaking_task: Optional[asyncio.Task] = None
+        # Jugadores sin rival local publicados en la espera compartida del
+        # backend -> bucket con el que se publicaron
+        self._offered_waiting: Dict[str, str] = {}
+        # Una sola rueda de temporizadores (limpiezas por desconexión, snapshots,
+        # heartbeat) y su ticker
+        self._timers = TimerWheel(tick=1.0)
+        self._timer_task: Optional[asyncio.Task] = None
+        # game_id -> Game vs IA, de la menos a la más recientemente usada
+        self._single_player_games: "OrderedDict[str, Game]" = OrderedDict()
+        self._single_player_difficulty: Dict[str, str] = {}  # game_id -> dificultad
+        self._single_player_ttl = single_player_ttl
+        self._max_single_player_games = max_single_player_games
+        # Búsquedas de tableros grandes en un pool de procesos, fuera del loop
+        self._ai = AIService(solved_table, ai_workers, ai_max_concurrent, ai_time_budget)
+        # Configuración de las colas de salida por jugador
+        self._send_queue_size = send_queue_size
+        self._backpressure_policy = backpressure_policy
+        # Log de movimientos para recuperar las partidas tras una caída o un deploy
+        self._move_log = move_log
+        self._snapshot_interval = snapshot_interval
+        # Límite de frames por jugador y tipo de mensaje
+        self._rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self._throttle_action = throttle_action
+        self._rate_limited_frame = encode_message({
+            "type": mt.MessageType.ERROR.value,
+            "message": "Demasiados mensajes, espera un momento"
+        })
+        # Heartbeat desde la rueda de temporizadores (un solo tick para todos)
+        self._heartbeat_interval = heartbeat_interval
+        self._heartbeat_max_missed = heartbeat_max_missed
+        self._ping_frame = encode_message({"type": mt.MessageType.PING.value})
+        # Espectadores: fan-out de solo lectura con escritores propios por shard
+        self._spectators = SpectatorHub(spectator_shards)
+        # Chat: historial acotado por partida y, si hay ventana, líneas por agrupar
+        # y la tarea que enviará cada lote
+        if chat_history_size < 0:
+            raise ValueError("chat_history_size no puede ser negativo")
+        self._chat_history: Dict[str, RingBuffer] = {}
+        self._chat_history_size = chat_history_size
+        self._chat_pending: Dict[str, list] = {}
+        self._chat_flush_tasks: Dict[str, asyncio.Task] = {}
+        self._chat_coalesce_window = chat_coalesce_window
+        # Reanudación de sesiones: token firmado con el id del jugador
+        self._signer = SessionSigner(session_secret)
+        self._resume_requires_token = resume_requires_token
+        # Estadísticas por jugador y ranking (lecturas en memoria, escrituras por lotes)
+        self._stats = stats if stats is not None else StatsStore()
+        # Métricas expuestas en /metrics
+        self.metrics = Registry(prefix="triqui_")
+        self._init_metrics()
+        self._build_dispatch()
+
+    def _init_metrics(self):
+        """Crea las métricas y preasigna los hijos por etiqueta del camino caliente."""
+        registry = self.metrics
+        messages = registry.counter(
+            "messages_total", "Mensajes de clientes procesados por tipo", ["type"]
+        )
+        durations = registry.histogram(
+            "message_duration_seconds", "Tiempo de handle_message por tipo", ["type"]
+        )
+        self._message_counters = messages
+        self._message_durations = durations
+        self._throttled_frames = registry.counter(
+            "throttled_frames_total", "Frames que excedieron el límite de su tipo", ["type"]
+        )
+        self._broadcast_duration = registry.histogram(
+            "broadcast_duration_seconds", "Tiempo de serializar y encolar un broadcast"
+        )
+        self._send_failures = registry.counter(
+            "send_failures_total", "Envíos fallidos o colas de salida desbordadas"
+        )
+        self._dropped_frames = registry.counter(
+            "dropped_frames_total", "Snapshots y deltas superados descartados por contrapresión"
+        )
+        self._heartbeat_rtt = registry.histogram(
+            "heartbeat_rtt_seconds", "RTT medido con ping/pong",
+            buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5)
+        )
+        self._heartbeat_evictions = registry.counter(
+            "heartbeat_evictions_total", "Conexiones cerradas por no responder al heartbeat"
+        )
+        registry.gauge("active_games", "Partidas en la caché local", lambda: len(self.games))
+        registry.gauge("players", "Jugadores registrados en este worker",
+                       lambda: len(self._players))
+        registry.gauge("waiting_queue_size", "Jugadores en la cola de emparejamiento",
+                       lambda: len(self._matchmaking))
+        registry.gauge("spectators", "Espectadores suscritos a partidas",
+                       lambda: self._spectators.count)
+        registry.gauge("pending_timers", "Temporizadores pendientes (limpiezas, snapshots, heartbeat)",
+                       lambda: len(self._timers))
+        registry.gauge("single_player_games", "Partidas contra la IA en memoria",
+                       lambda: len(self._single_player_games))
+        registry.gauge("ranked_players", "Jugadores con estadísticas en el ranking",
+                       lambda: len(self._stats))
+        registry.gauge("ai_searches_in_flight", "Búsquedas de la IA en curso (ya deduplicadas)",
+                       lambda: self._ai.in_flight)
+
+    def _build_dispatch(self):
+        """Tabla de despacho por tipo (string): handler, esquema, límite y métricas.
+
+        Se construye una sola vez; por mensaje solo queda un lookup en un dict.
+        """
+        handlers = {
+            mt.MessageType.MOVE.value: self._handle_move,
+            mt.MessageType.GAME_RESET.value: self._handle_reset,
+            mt.MessageType.CHAT_MESSAGE.value: self._handle_chat,
+            mt.MessageType.SYNC.value: self._handle_sync,
+            mt.MessageType.PONG.value: self._handle_pong,
+        }
+        self._dispatch = {
+            mtype: self._route(mtype, handler, MESSAGE_SCHEMAS[mtype])
+            for mtype, handler in handlers.items()
+        }
+        # "invalid" agrupa los tipos desconocidos y los frames mal formados
+        self._invalid_route = self._route("invalid", None, None)
+        self._rate_limiters = [route[2] for route in self._dispatch.values()]
+        self._rate_limiters.append(self._invalid_route[2])
+        # Tipos del protocolo que el cliente no debe enviar
+        self._unsupported_types = frozenset(
+            mtype.value for mtype in mt.MessageType
+        ) - self._dispatch.keys()
+
+    def _route(self, mtype: str, handler, schema) -> tuple:
+        capacity, refill_rate = self._rate_limits[mtype]
+        return (handler, schema, TokenBucketLimiter(capacity, refill_rate),
+                self._message_counters.labels(mtype), self._message_durations.labels(mtype),
+                self._throttled_frames.labels(mtype))
+
+    async def start(self):
+        """Arranca el backend de estado y el tick de emparejamiento.
+
+        Con log de movimientos, antes restaura las partidas en curso.
+        """
+        await self._backend.start()
+        await self._stats.start()
+        self._spectators.start()
+        self._ai.start()
+        if self._move_log:
+            loop = asyncio.get_running_loop()
+            games, players = await loop.run_in_executor(None, self._move_log.recover)
+            await self._restore(games, players)
+            await self._move_log.start()
+            self._schedule_snapshot()
+        if self._heartbeat_interval:
+            self._schedule_heartbeat()
+        self._matchmaking_task = asyncio.create_task(self._matchmaking_loop())
+        self._timer_task = asyncio.create_task(self._timer_loop())
+
+    async def close(self):
+        """Detiene los ticks periódicos y libera el backend de estado."""
+        for task in (self._matchmaking_task, self._timer_task,
+                     *self._chat_flush_tasks.values()):
+            if task:
+                task.cancel()
+        self._chat_flush_tasks.clear()
+        self._matchmaking_task = None
+        self._timer_task = None
+        await self._spectators.close()
+        await self._ai.close()
+        await self._stats.close()
+        if self._move_log:
+            # Un snapshot final deja el log compacto para el siguiente arranque
+            self._take_snapshot()
+            await self._move_log.close()
+        await self._backend.close()
+
+    async def _restore(self, games: Dict[str, Game], players: Dict[str, dict]):
+        """Restaura partidas recuperadas del log.
+
+        Los jugadores de este worker quedan como desconectados, con su id y
+        su partida, hasta que vuelvan o venza su temporizador de limpieza. Los
+        rivales conectados a otro worker no se registran aquí: siguen
+        recibiendo la partida por el backend.
+        """
+        for game in games.values():
+            self.games[game.id] = game
+            await self._backend.save_game(game)
+        for player_id, record in players.items():
+            player = PlayerConnection(None, record["name"], self._send_queue_size,
+                                      self._backpressure_policy)
+            player.id = player_id
+            player.game_id = record["game_id"]
+            player.connected = False
+            player.on_send_failure = self._handle_send_failure
+            player.on_frames_dropped = self._dropped_frames.inc
+            self._players[player_id] = player
+            await self._backend.save_player(player_id, player.name, player.game_id, False)
+            self._timers.schedule(
+                ("cleanup", player_id), CLEANUP_DELAY,
+                functools.partial(self._cleanup_player, player_id)
+            )
+        if games:
+            logger.info(f"Restauradas {len(games)} partidas y {len(players)} jugadores")
+
+    def _log(self, record: dict):
+        if self._move_log:
+            self._move_log.append(record)
+
+    def _take_snapshot(self):
+        """Encola un snapshot de las partidas locales en el log de movimientos."""
+        players = {}
+        for game in self.games.values():
+            for player_id in (game.player_x, game.player_o):
+                player = self._players.get(player_id)
+                if player_id and player:
+                    players[player_id] = {"name": player.name, "game_id": game.id}
+        self._move_log.snapshot([game.to_dict() for game in self.games.values()], players)
+
+    def _schedule_snapshot(self):
+        self._timers.schedule(("snapshot",), self._snapshot_interval, self._snapshot_tick)
+
+    async def _snapshot_tick(self):
+        self._take_snapshot()
+        self._schedule_snapshot()
+
+    def _schedule_heartbeat(self):
+        self._timers.schedule(("heartbeat",), self._heartbeat_interval, self._heartbeat_tick)
+
+    async def _heartbeat_tick(self):
+        """Envía un ping a cada jugador local y desaloja a quien no responde.
+
+        El frame del ping se serializa una sola vez; quien acumula
+        `heartbeat_max_missed` pings sin pong se trata como desconectado.
+        """
+        self._schedule_heartbeat()
+        now = time.monotonic()
+        frame = self._ping_frame
+        evicted = []
+        for player in self._players.values():
+            if not player.connected or not player.websocket:
+                continue
+            if player.ping_sent_at is not None:
+                player.missed_beats += 1
+                if player.missed_beats >= self._heartbeat_max_missed:
+                    evicted.append(player)
+                    continue
+            player.ping_sent_at = now
+            player.enqueue(frame)
+        for player in evicted:
+            logger.info(f"Jugador {player.name} no responde al heartbeat; desconectando")
+            self._heartbeat_evictions.inc()
+            await self._evict(player)
+
+    def _send_ping(self, player: PlayerConnection):
+        player.ping_sent_at = time.monotonic()
+        player.enqueue(self._ping_frame)
+
+    async def _handle_pong(self, player: PlayerConnection, data: dict):
+        """Registra el RTT del último ping y reinicia los latidos perdidos."""
+        if player.ping_sent_at is None:
+            return
+        rtt = time.monotonic() - player.ping_sent_at
+        player.ping_sent_at = None
+        if player.missed_beats:
+            # Respuesta tardía a un ping anterior: no sirve como muestra de RTT
+            player.missed_beats = 0
+            return
+        player.rtt = rtt if player.rtt is None else player.rtt + RTT_SMOOTHING * (rtt - player.rtt)
+        self._heartbeat_rtt.observe(rtt)
+        # Si sigue esperando rival, pasa al nivel de latencia que le corresponde
+        self._matchmaking.update_latency(player.id, player.rtt * 1000)
+
+    async def _evict(self, player: PlayerConnection):
+        """Cierra la conexión desde el servidor y procesa la desconexión."""
+        await player.close()
+        await self._handle_disconnect(player)
+
+    @property
+    def pending_timers(self) -> int:
+        """Temporizadores pendientes (limpiezas, snapshots y heartbeat)."""
+        return len(self._timers)
+
+    async def _timer_loop(self):
+        """Ticker central: ejecuta por lotes los temporizadores vencidos."""
+        while True:
+            await asyncio.sleep(self._timers.tick)
+            for callback in self._timers.advance():
+                try:
+                    await callback()
+                except Exception:
+                    logger.exception("Error ejecutando un temporizador")
+
+    async def register_player(self, websocket, name: Optional[str] = None,
+                              player_key: Optional[str] = None) -> PlayerConnection:
+        """Registra un nuevo jugador.
+
+        Con una clave de jugador válida conserva su identidad estable (la de
+        sus estadísticas); si no, se le asigna una nueva.
+        """
+        name = name.strip()[:MAX_PLAYER_NAME] if isinstance(name, str) else None
+        player = PlayerConnection(websocket, name or None, self._send_queue_size,
+                                  self._backpressure_policy)
+        player.stats_key = self._signer.key_id(player_key) or new_id()
+        player.on_send_failure = self._handle_send_failure
+        player.on_frames_dropped = self._dropped_frames.inc
+        self._players[player.id] = player
+        await self._backend.save_player(player.id, player.name, None, True, player.stats_key)
+        logger.info(f"Jugador registrado: {player.name} ({player.id})")
         return player
 
-    async def connect_and_pair(self, player: PlayerConnection) -> Optional[Game]:
-        """Conecta un jugador y lo empareja si hay otro esperando."""
-        if player.game_id:
-            # Si el jugador ya está en una partida, reconectarlo
-            game = self.games.get(player.game_id)
-            if game:
-                player.connected = True
-                await self._broadcast_game_state(game)
-                logger.info(f"Jugador {player.name} reconectado a la partida {game.id}")
-                return game
-            else:
-                player.game_id = None
+    async def connect_player(self, websocket, name: Optional[str] = None,
+                             delta_mode: bool = False,
+                             bucket: Hashable = None,
+                             player_key: Optional[str] = None) -> PlayerConnection:
+        """Registra un jugador recién conectado y lo pone en la cola de emparejamiento."""
+        player = await self.register_player(websocket, name, player_key)
+        player.delta_mode = delta_mode
+        self._send_registered(player)
+        # Primer ping de inmediato: el RTT ayuda a elegir su nivel de latencia
+        if self._heartbeat_interval:
+            self._send_ping(player)
+        await self.connect_and_pair(player, bucket)
+        return player
 
-        # Si no hay jugador esperando, este jugador espera
-        if not self._waiting_player:
-            self._waiting_player = player.id
-            player.connected = True
-            await player.send({
-                "type": mt.MessageType.WAITING.value,
-                "message": "Esperando a otro jugador..."
-            })
-            return None
+    def _send_registered(self, player: PlayerConnection):
+        """Identidad de la sesión (para reanudarla) y la clave de jugador que
+        el cliente guarda y manda al unirse de nuevo."""
+        player.enqueue(encode_message({
+            "type": mt.MessageType.REGISTERED.value,
+            "playerId": player.id,
+            "name": player.name,
+            "token": self._signer.sign(player.id),
+            "playerKey": self._signer.player_key(player.stats_key)
+        }))
 
-        # Si el jugador que espera es el mismo, actualizar su conexión
-        if self._waiting_player == player.id:
-            player.connected = True
-            await player.send({
-                "type": mt.MessageType.WAITING.value,
-                "message": "Esperando a otro jugador..."
-            })
+    async def resume_player(self, websocket, player_id: str, token: Optional[str] = None,
+                            delta_mode: bool = False,
+                            player_key: Optional[str] = None) -> Optional[PlayerConnection]:
+        """Reanuda la sesión de un jugador existente sobre un websocket nuevo.
+
+        Busca la conexión por id (O(1)), le cambia el socket y reinicia su
+        escritor; si la conexión anterior seguía abierta se cierra. El
+        jugador recibe un solo snapshot de su partida (y el historial de
+        chat) o vuelve a la cola. Retorna None si el id no existe en este
+        worker o el token no es válido: el llamador inicia una sesión nueva.
+        """
+        player = self._players.get(player_id) if isinstance(player_id, str) else None
+        if player is None:
             return None
+        if token is not None or self._resume_requires_token:
+            if not self._signer.verify(player.id, token):
+                logger.warning(f"Token inválido al reanudar la sesión de {player.id}")
+                return None
 
-        # Emparejar con el jugador que espera
-        waiting_player = self._players.get(self._waiting_player)
-        if not waiting_player or not waiting_player.connected:
-            # Si el jugador que espera ya no está disponible, este jugador pasa a esperar
-            self._waiting_player = player.id
-            player.connected = True
-            await player.send({
-                "type": mt.MessageType.WAITING.value,
-                "message": "Esperando a otro jugador..."
-            })
+        old_websocket = player.websocket if player.connected else None
+        player.stop_writer()
+        player.websocket = websocket
+        player.delta_mode = delta_mode
+        player.ping_sent_at = None
+        player.missed_beats = 0
+        # Marcado como conectado antes de encolar: la limpieza pendiente ya no lo borra
+        player.connected = True
+        # Un jugador restaurado del log no trae su clave: la recupera del cliente
+        player.stats_key = self._signer.key_id(player_key) or player.stats_key or new_id()
+        await self._backend.save_player(player.id, player.name, player.game_id, True,
+                                        player.stats_key)
+        self._send_registered(player)
+        if self._heartbeat_interval:
+            self._send_ping(player)
+
+        if old_websocket is None:
+            # Desconectado (o restaurado del log): se cancela su limpieza y
+            # vuelve a su partida como en cualquier reconexión
+            await self.connect_and_pair(player)
+        else:
+            # Cambio de red con el socket viejo aún abierto: el rival no vio
+            # desconexión, solo este jugador necesita ponerse al día
+            try:
+                await old_websocket.close()
+            except Exception:
+                pass
+            await self._catch_up(player)
+        logger.info(f"Sesión de {player.name} reanudada")
+        return player
+
+    async def _catch_up(self, player: PlayerConnection):
+        """Snapshot de la partida (o aviso de espera) para un socket nuevo."""
+        game_id = player.game_id
+        if game_id:
+            async with self._game_lock(game_id):
+                game = await self._get_game(game_id)
+                if game:
+                    await player.send(await self._game_snapshot(game))
+                    await self._replay_chat(player, game_id)
+                    return
+            player.game_id = None
+        self._matchmaking.enqueue(player.id)
+        await player.send({
+            "type": mt.MessageType.WAITING.value,
+            "message": "Esperando a otro jugador..."
+        })
+
+    def matchmaking_bucket(self, region: Optional[str] = None, rating: Optional[int] = None,
+                           rtt_ms: Optional[float] = None) -> Hashable:
+        """Bucket de emparejamiento para los atributos de un jugador."""
+        return self._matchmaking.bucket_for(region, rating, rtt_ms)
+
+    def matchmaking_stats(self) -> dict:
+        """Métricas de la cola: profundidad y tiempo hasta el emparejamiento."""
+        stats = self._matchmaking.metrics()
+        stats["offered_to_backend"] = len(self._offered_waiting)
+        return stats
+
+    async def add_spectator(self, websocket, game_id: str) -> Optional[Spectator]:
+        """Suscribe un socket de solo lectura a una partida; None si no existe."""
+        game = await self._find_game(game_id)
+        if not game:
             return None
+        return self._spectators.subscribe(websocket, game.id, await self._game_snapshot(game))
 
-        # Crear nueva partida
-        game = Game()
-        game.player_x = waiting_player.id
-        game.player_o = player.id
-        self.games[game.id] = game
+    def remove_spectator(self, spectator: Spectator):
+        self._spectators.unsubscribe(spectator)
+
+    def spectator_count(self, game_id: str) -> int:
+        return self._spectators.spectators_of(game_id)
 
-        # Actualizar estado de los jugadores
-        waiting_player.game_id = game.id
-        player.game_id = game.id
+    def list_games(self, limit: int = 20) -> list:
+        """Partidas locales en curso, las más vistas primero."""
+        games = [
+            {"gameId": game.id, "seq": game.seq, "wins": game.wins,
+             "spectators": self._spectators.spectators_of(game.id)}
+            for game in self.games.values()
+        ]
+        games.sort(key=lambda g: g["spectators"], reverse=True)
+        return games[:limit]
+
+    def leaderboard(self, limit: int = 10) -> list:
+        """Top de jugadores por puntos (desde memoria)."""
+        return self._stats.top(limit)
+
+    def player_stats(self, key_id: str) -> Optional[dict]:
+        """Resultados y posición por id de clave de jugador (None si no ha jugado)."""
+        return self._stats.get(key_id)
+
+    async def disconnect_player(self, player: PlayerConnection, websocket=None):
+        """Punto de entrada para el cierre del websocket de un jugador.
+
+        Si se pasa `websocket` y la sesión ya se reanudó en otro socket, el
+        cierre del viejo no desconecta al jugador.
+        """
+        if websocket is not None and player.websocket is not websocket:
+            return
+        await self._handle_disconnect(player)
+
+    async def connect_and_pair(self, player: PlayerConnection,
+                               bucket: Hashable = None) -> Optional[Game]:
+        """Reconecta al jugador a su partida o lo encola para emparejarlo."""
+        if player.game_id:
+            # Si el jugador ya está en una partida, reconectarlo
+            async with self._game_lock(player.game_id):
+                game = await self._get_game(player.game_id)
+                if game:
+                    player.connected = True
+                    self._timers.cancel(("cleanup", player.id))
+                    await self._backend.save_player(player.id, player.name, game.id, True,
+                                                    player.stats_key)
+                    await self._broadcast_game_state(game)
+                    await self._replay_chat(player, game.id)
+                    logger.info(f"Jugador {player.name} reconectado a la partida {game.id}")
+                    return game
+            player.game_id = None
+
+        # El emparejamiento ocurre en el siguiente tick (_run_matchmaking)
         player.connected = True
+        self._matchmaking.enqueue(player.id, bucket)
+        await player.send({
+            "type": mt.MessageType.WAITING.value,
+            "message": "Esperando a otro jugador..."
+        })
+        return None
+
+    async def _matchmaking_loop(self):
+        """Tick periódico de emparejamiento por lotes."""
+        while True:
+            await asyncio.sleep(self._matchmaking_interval)
+            try:
+                await self._run_matchmaking()
+            except Exception:
+                logger.exception("Error en el tick de emparejamiento")
 
-        # Limpiar jugador en espera
-        self._waiting_player = None
+    async def _run_matchmaking(self):
+        """Empareja la cola local y ofrece los sobrantes a los demás workers."""
+        queue = self._matchmaking
+        now = time.monotonic()
+        for first, second in queue.pop_pairs(now):
+            first_ok = await self._claim_for_match(first.player_id)
+            second_ok = await self._claim_for_match(second.player_id)
+            if first_ok and second_ok:
+                queue.record_match(first, second, now=now)
+                await self._start_game(first.player_id, second.player_id)
+            elif first_ok:
+                queue.requeue(first)
+            elif second_ok:
+                queue.requeue(second)
 
-        # Notificar a ambos jugadores
-        await self._broadcast_game_state(game)
-        logger.info(f"Nueva partida {game.id}: {waiting_player.name} vs {player.name}")
+        # Quien sigue sin rival se publica en la espera compartida con su
+        # bucket; se vuelve a publicar si cambia (latencia o espera relajada)
+        for entry in queue.waiting_entries():
+            bucket = queue.shared_bucket(entry, now)
+            offered = self._offered_waiting.get(entry.player_id)
+            if offered == bucket:
+                continue
+            if offered is not None:
+                del self._offered_waiting[entry.player_id]
+                if not await self._backend.remove_waiting(entry.player_id):
+                    # Otro worker ya lo tomó: la partida llega con su primer frame
+                    queue.remove(entry.player_id)
+                    continue
+            opponent_id = await self._backend.claim_waiting(entry.player_id, bucket)
+            if not opponent_id:
+                self._offered_waiting[entry.player_id] = bucket
+                continue
+            queue.remove(entry.player_id)
+            if opponent_id in self._offered_waiting:
+                # El rival estaba publicado por este mismo worker
+                del self._offered_waiting[opponent_id]
+                queue.remove(opponent_id)
+            queue.record_match(entry, now=now)
+            await self._start_game(opponent_id, entry.player_id)
+
+    async def _claim_for_match(self, player_id: str) -> bool:
+        """Confirma que un jugador de la cola sigue disponible para jugar."""
+        player = self._players.get(player_id)
+        if not player or not player.connected:
+            return False
+        if player_id in self._offered_waiting:
+            del self._offered_waiting[player_id]
+            # Si otro worker ya lo tomó de la espera compartida, no está disponible
+            return await self._backend.remove_waiting(player_id)
+        return True
+
+    async def _start_game(self, opponent_id: str, player_id: str) -> Game:
+        """Crea la partida (el primero juega con X) y notifica a ambos."""
+        player = self._players.get(player_id)
+        game = Game(player_x=opponent_id, player_o=player_id)
+        self.games[game.id] = game
+        await self._backend.save_game(game)
+        # Solo los jugadores de este worker: los de otro se resuelven vía el backend
+        self._log({"op": "game", "game": game.to_dict(), "players": {
+            pid: self._players[pid].name for pid in (opponent_id, player_id)
+            if pid in self._players
+        }})
+
+        # Actualizar estado de los jugadores; si el rival es remoto, su worker
+        # recibe el game_id junto con el primer frame de la partida
+        # El lock evita que un primer movimiento se difunda antes del snapshot inicial
+        async with self._game_lock(game.id):
+            waiting_player = self._players.get(opponent_id)
+            if waiting_player:
+                waiting_player.game_id = game.id
+            player.game_id = game.id
+            await self._backend.set_player_game(opponent_id, game.id)
+            await self._backend.set_player_game(player_id, game.id)
+
+            # Notificar a ambos jugadores
+            await self._broadcast_game_state(game)
+        logger.info(f"Nueva partida {game.id}: {opponent_id} vs {player.name}")
         return game
 
     async def handle_message(self, player: PlayerConnection, data: dict):
-        """Procesa mensajes del jugador."""
-        try:
-            mtype = mt.MessageType(data.get("type"))
-        except ValueError:
-            await player.send({
-                "type": mt.MessageType.ERROR.value,
-                "message": f"Tipo de mensaje inválido: {data.get('type')}"
-            })
+        """Procesa mensajes del jugador.
+
+        El frame se valida contra el esquema de su tipo antes de llegar al
+        handler; los inválidos solo generan un mensaje de error.
+        """
+        start = time.perf_counter()
+        mtype = data.get("type") if type(data) is dict else None
+        if type(mtype) is not str:
+            # Sin tipo o con un tipo que no es texto (p. ej. una lista, que
+            # además no sirve de clave): va a la ruta de inválidos
+            mtype = None
+        route = self._dispatch.get(mtype) or self._invalid_route
+        handler, schema, limiter, counter, duration, throttled = route
+
+        # Límite por jugador y tipo antes de cualquier otro trabajo
+        if self._throttle_action is ThrottleAction.DELAY:
+            wait = limiter.reserve(player.id)
+            if wait:
+                throttled.inc()
+                await asyncio.sleep(wait)
+        elif not limiter.is_allowed(player.id):
+            throttled.inc()
+            await self._reject_throttled(player)
             return
 
-        handlers = {
-            mt.MessageType.MOVE: self._handle_move,
-            mt.MessageType.GAME_RESET: self._handle_reset,
-            mt.MessageType.CHAT_MESSAGE: self._handle_chat
-        }
+        if handler is None:
+            if mtype in self._unsupported_types:
+                error = f"Tipo de mensaje no soportado: {mtype}"
+            elif type(data) is not dict:
+                error = "Mensaje inválido: se esperaba un objeto JSON"
+            else:
+                error = f"Tipo de mensaje inválido: {mtype}"
+            await player.send({"type": mt.MessageType.ERROR.value, "message": error})
+        else:
+            error = schema.validate(data)
+            if error is None:
+                await handler(player, data)
+            else:
+                await player.send({"type": mt.MessageType.ERROR.value, "message": error})
+        counter.inc()
+        duration.observe(time.perf_counter() - start)
 
-        handler = handlers.get(mtype)
-        if handler:
-            await handler(player, data)
+    async def _reject_throttled(self, player: PlayerConnection):
+        """Descarta un frame que excede el límite o desconecta al cliente."""
+        if self._throttle_action is ThrottleAction.DISCONNECT:
+            logger.warning(f"Jugador {player.name} excedió el límite de mensajes; desconectando")
+            await self._evict(player)
         else:
-            await player.send({
-                "type": mt.MessageType.ERROR.value,
-                "message": f"Tipo de mensaje no soportado: {mtype}"
-            })
+            # Frame de error preconstruido: avisar no cuesta serializar nada
+            player.enqueue(self._rate_limited_frame)
 
     async def _handle_move(self, player: PlayerConnection, data: dict):
         """Procesa un movimiento del jugador."""
@@ -125,7 +720,12 @@ class GameManager:
             })
             return
 
-        game = self.games.get(player.game_id)
+        async with self._game_lock(player.game_id):
+            await self._apply_move(player, player.game_id, data)
+
+    async def _apply_move(self, player: PlayerConnection, game_id: str, data: dict):
+        """Valida, aplica y difunde un movimiento (con el lock de la partida tomado)."""
+        game = await self._get_game(game_id)
         if not game:
             await player.send({
                 "type": mt.MessageType.ERROR.value,
@@ -133,48 +733,65 @@ class GameManager:
             })
             return
 
-        if game.current_player != player:
+        if game.current_player != player.id:
             await player.send({
                 "type": mt.MessageType.ERROR.value,
                 "message": "No es tu turno"
             })
             return
 
-        try:
-            pos = data.get("position")
-            if not isinstance(pos, int) or pos < 0 or pos > 8:
-                raise ValueError("Posición debe ser un número entre 0 y 8")
-            
-            if not game.make_move(pos):
-                await player.send({
-                    "type": mt.MessageType.ERROR.value,
-                    "message": "Casilla ya ocupada o movimiento inválido"
-                })
-                return
-
-            # Actualizar estado del juego
-            await self._broadcast_game_state(game)
-            
-            # Verificar fin del juego
-            if game.winner:
-                winner = self._players.get(game.winner)
-                await self._broadcast_to_game(game, {
-                    "type": mt.MessageType.GAME_OVER.value,
-                    "winner": winner.name if winner else "Desconocido",
-                    "board": game.board
-                })
-            elif game.is_draw:
-                await self._broadcast_to_game(game, {
-                    "type": mt.MessageType.GAME_OVER.value,
-                    "winner": "Empate",
-                    "board": game.board
-                })
-
-        except (ValueError, TypeError) as e:
+        # La posición ya viene validada por el esquema del mensaje (0-8)
+        pos = data["position"]
+        symbol = game.turn
+        expected_seq = game.seq
+        if not game.make_move(pos):
             await player.send({
                 "type": mt.MessageType.ERROR.value,
-                "message": f"Error en el movimiento: {str(e)}"
+                "message": "Casilla ya ocupada o movimiento inválido"
+            })
+            return
+        if not await self._save_game(player, game, expected_seq):
+            return
+        self._log({"op": "move", "id": game.id, "pos": pos})
+
+        # Actualizar estado del juego
+        await self._broadcast_game_state(
+            game, mt.MessageBuilder.game_delta(game.seq, pos, symbol, game.turn)
+        )
+
+        # Verificar fin del juego
+        if game.finished:
+            x_info = await self._stats_identity(game.player_x)
+            o_info = await self._stats_identity(game.player_o)
+            # Solo cuentan para el ranking partidas entre jugadores con clave y
+            # nombre propio, distintos (no dos pestañas del mismo jugador)
+            ranked = (x_info["id"] and o_info["id"] and x_info["id"] != o_info["id"]
+                      and is_ranked(x_info) and is_ranked(o_info)
+                      and x_info["name"] != o_info["name"])
+            if game.winner == "X":
+                winner_name = x_info["name"]
+                if ranked:
+                    self._stats.record_win(x_info, o_info)
+            elif game.winner == "O":
+                winner_name = o_info["name"]
+                if ranked:
+                    self._stats.record_win(o_info, x_info)
+            else:
+                winner_name = "Empate"
+                if ranked:
+                    self._stats.record_draw(x_info, o_info)
+            game_over = {
+                "type": mt.MessageType.GAME_OVER.value,
+                "winner": winner_name,
+                "board": game.board
+            }
+            # Los clientes en modo delta ya tienen el tablero
+            await self._broadcast_to_game(game, game_over, {
+                "type": mt.MessageType.GAME_OVER.value,
+                "winner": winner_name,
+                "seq": game.seq
             })
+            self._spectators.publish(game.id, game_over)
 
     async def _handle_reset(self, player: PlayerConnection, data: dict):
         """Reinicia una partida - ambos jugadores deben estar de acuerdo."""
@@ -185,7 +802,12 @@ class GameManager:
             })
             return
 
-        game = self.games.get(player.game_id)
+        async with self._game_lock(player.game_id):
+            await self._apply_reset(player, player.game_id)
+
+    async def _apply_reset(self, player: PlayerConnection, game_id: str):
+        """Reinicia y difunde la partida (con el lock de la partida tomado)."""
+        game = await self._get_game(game_id)
         if not game:
             await player.send({
                 "type": mt.MessageType.ERROR.value,
@@ -194,13 +816,47 @@ class GameManager:
             return
 
         # Reiniciar el juego
+        expected_seq = game.seq
         game.reset()
-        
+        if not await self._save_game(player, game, expected_seq):
+            return
+        self._log({"op": "reset", "id": game.id})
+
         # Notificar a los jugadores
         await self._broadcast_to_game(game, {
             "type": mt.MessageType.GAME_RESET.value,
             "board": game.board,
-            "current_player": "X" if game.current_player == game.player_x else "O"
+            "current_player": game.turn,
+            "seq": game.seq
+        })
+        if self._spectators.watching(game.id):
+            self._spectators.publish(game.id, await self._game_snapshot(game))
+
+    async def _handle_sync(self, player: PlayerConnection, data: dict):
+        """Envía un snapshot completo al jugador y opcionalmente cambia su protocolo.
+
+        Los clientes en modo delta lo usan al detectar un hueco en `seq`.
+        """
+        protocol = data.get("protocol")
+        if protocol is not None:
+            player.delta_mode = protocol == "delta"
+
+        game_id = player.game_id
+        if not game_id:
+            await player.send({
+                "type": mt.MessageType.ERROR.value,
+                "message": "No estás en una partida"
+            })
+            return
+        # Con el lock, ningún delta posterior puede encolarse antes del snapshot
+        async with self._game_lock(game_id):
+            game = await self._get_game(game_id)
+            if game:
+                await player.send(await self._game_snapshot(game))
+                return
+        await player.send({
+            "type": mt.MessageType.ERROR.value,
+            "message": "No estás en una partida"
         })
 
     async def _handle_chat(self, player: PlayerConnection, data: dict):
@@ -212,7 +868,7 @@ class GameManager:
             })
             return
 
-        game = self.games.get(player.game_id)
+        game = await self._find_game(player.game_id)
         if not game:
             await player.send({
                 "type": mt.MessageType.ERROR.value,
@@ -220,101 +876,367 @@ class GameManager:
             })
             return
 
-        message = data.get("message", "").strip()
-        if not message:
-            await player.send({
-                "type": mt.MessageType.ERROR.value,
-                "message": "Mensaje vacío"
+        line = {"sender": player.name, "message": data["message"].strip()}
+        if self._chat_history_size:
+            history = self._chat_history.get(game.id)
+            if history is None:
+                history = self._chat_history[game.id] = RingBuffer(self._chat_history_size)
+            history.append(line)
+
+        if not self._chat_coalesce_window:
+            # Enviar mensaje a todos los jugadores en la partida
+            await self._broadcast_to_game(game, {
+                "type": mt.MessageType.CHAT_MESSAGE.value, **line
             })
             return
 
-        # Enviar mensaje a todos los jugadores en la partida
-        await self._broadcast_to_game(game, {
-            "type": mt.MessageType.CHAT_MESSAGE.value,
-            "sender": player.name,
-            "message": message
-        })
+        # Ventana de agrupación: la primera línea programa el envío del lote
+        pending = self._chat_pending.get(game.id)
+        if pending is None:
+            self._chat_pending[game.id] = [line]
+            self._chat_flush_tasks[game.id] = asyncio.create_task(self._flush_chat(game.id))
+        else:
+            pending.append(line)
 
-    async def _broadcast_game_state(self, game: Game):
-        """Envía el estado actual del juego a todos los jugadores."""
-        await self._broadcast_to_game(game, {
-            "type": mt.MessageType.GAME_STATE.value,
-            "board": game.board,
-            "current_player": "X" if game.current_player == game.player_x else "O",
-            "player_x": self._get_player_info(game.player_x),
-            "player_o": self._get_player_info(game.player_o)
+    async def _flush_chat(self, game_id: str):
+        """Al cerrar la ventana, envía en un solo frame las líneas acumuladas."""
+        try:
+            await asyncio.sleep(self._chat_coalesce_window)
+        finally:
+            self._chat_flush_tasks.pop(game_id, None)
+        lines = self._chat_pending.pop(game_id, None)
+        game = self.games.get(game_id)
+        if not lines or not game:
+            return
+        if len(lines) == 1:
+            message = {"type": mt.MessageType.CHAT_MESSAGE.value, **lines[0]}
+        else:
+            message = {"type": mt.MessageType.CHAT_BATCH.value, "messages": lines}
+        await self._broadcast_to_game(game, message)
+
+    async def _replay_chat(self, player: PlayerConnection, game_id: str):
+        """Reenvía el historial de chat de la partida a un jugador que vuelve."""
+        history = self._chat_history.get(game_id)
+        if history:
+            await player.send({
+                "type": mt.MessageType.CHAT_HISTORY.value,
+                "messages": history.to_list()
+            })
+
+    async def _get_game(self, game_id: str) -> Optional[Game]:
+        """Carga el estado más reciente de la partida desde el backend."""
+        game = await self._backend.load_game(game_id)
+        if game is None:
+            self.games.pop(game_id, None)
+            self._game_locks.pop(game_id, None)
+        else:
+            self.games[game_id] = game
+        return game
+
+    async def _find_game(self, game_id: str) -> Optional[Game]:
+        """Partida para consultas que no dependen del tablero (p. ej. chat)."""
+        return self.games.get(game_id) or await self._get_game(game_id)
+
+    def _game_lock(self, game_id: str) -> asyncio.Lock:
+        """Lock de la partida; se crea con el primer uso y se suelta al eliminarla."""
+        lock = self._game_locks.get(game_id)
+        if lock is None:
+            lock = self._game_locks[game_id] = asyncio.Lock()
+        return lock
+
+    async def _save_game(self, player: PlayerConnection, game: Game, expected_seq: int) -> bool:
+        """Guarda la partida; si otro worker la modificó antes, reenvía el estado."""
+        if await self._backend.save_game(game, expected_seq):
+            return True
+        await player.send({
+            "type": mt.MessageType.ERROR.value,
+            "message": "La partida cambió, intenta de nuevo"
         })
+        game = await self._get_game(game.id)
+        if game:
+            await player.send(await self._game_snapshot(game))
+        return False
 
-    async def _broadcast_to_game(self, game: Game, message: dict):
-        """Envía un mensaje a todos los jugadores en una partida."""
-        players = []
-        if game.player_x:
-            players.append(self._players.get(game.player_x))
-        if game.player_o:
-            players.append(self._players.get(game.player_o))
+    async def _game_snapshot(self, game: Game) -> dict:
+        """Estado completo de la partida (mensaje GAME_STATE)."""
+        return mt.MessageBuilder.game_snapshot(
+            game.board, game.turn, game.seq, game.wins,
+            await self._get_player_info(game.player_x),
+            await self._get_player_info(game.player_o)
+        )
 
-        for player in players:
-            if player and player.websocket:
-                try:
-                    await player.send(message)
-                except Exception as e:
-                    logger.error(f"Error al enviar mensaje a {player.name}: {str(e)}")
-                    player.connected = False
-                    asyncio.create_task(self._handle_disconnect(player))
+    async def _broadcast_game_state(self, game: Game, delta: Optional[dict] = None):
+        """Envía el estado actual del juego a todos los jugadores.
+
+        Si se pasa `delta`, los jugadores en modo delta reciben solo ese
+        cambio en lugar del snapshot completo.
+        """
+        snapshot = await self._game_snapshot(game)
+        await self._broadcast_to_game(game, snapshot, delta, FrameKind.STATE)
+        # Los espectadores siempre reciben el snapshot, después de los jugadores
+        self._spectators.publish(game.id, snapshot)
+
+    async def _broadcast_to_game(self, game: Game, message: dict,
+                                 delta_message: Optional[dict] = None,
+                                 kind: FrameKind = FrameKind.CONTROL):
+        """Envía un mensaje a todos los jugadores en una partida.
+
+        El mensaje se serializa una sola vez y el mismo frame de texto se
+        encola para cada destinatario; las tareas escritoras de cada jugador
+        hacen el envío, así que un socket lento no retrasa a los demás.
+        Los jugadores en modo delta reciben `delta_message` cuando se indica.
+        Los jugadores conectados a otro worker lo reciben vía el backend.
+        Con `kind` STATE el mensaje es un snapshot y el delta su cambio: la
+        contrapresión puede descartarlos cuando llega uno más nuevo.
+        """
+        delta_kind = FrameKind.DELTA if kind is FrameKind.STATE else kind
+        start = time.perf_counter()
+        frame = None
+        delta_frame = None
+        for player_id in (game.player_x, game.player_o):
+            if not player_id:
+                continue
+            player = self._players.get(player_id)
+            if player is None:
+                if frame is None:
+                    frame = encode_message(message)
+                if delta_message is not None and delta_frame is None:
+                    delta_frame = encode_message(delta_message)
+                await self._backend.publish(player_id, game.id, frame, delta_frame)
+            elif player.websocket:
+                if delta_message is not None and player.delta_mode:
+                    if delta_frame is None:
+                        delta_frame = encode_message(delta_message)
+                    player.enqueue(delta_frame, delta_kind)
+                else:
+                    if frame is None:
+                        frame = encode_message(message)
+                    player.enqueue(frame, kind)
+        self._broadcast_duration.observe(time.perf_counter() - start)
+
+    async def _send_to_player(self, player_id: str, game_id: Optional[str], message: dict):
+        """Envía un mensaje a un jugador, esté en este worker o en otro."""
+        player = self._players.get(player_id)
+        if player is not None:
+            await player.send(message)
+        else:
+            await self._backend.publish(player_id, game_id, encode_message(message))
+
+    async def _deliver_remote(self, player_id: str, game_id: Optional[str],
+                              frame: str, delta_frame: Optional[str]):
+        """Entrega un frame publicado por otro worker a un jugador local."""
+        player = self._players.get(player_id)
+        if player is None:
+            return
+        if game_id and player.game_id != game_id:
+            # Emparejado por otro worker: la partida se conoce con su primer frame
+            player.game_id = game_id
+            self._matchmaking.remove(player_id)
+            self._offered_waiting.pop(player_id, None)
+        if delta_frame is not None and player.delta_mode:
+            player.enqueue(delta_frame)
+        else:
+            player.enqueue(frame)
 
-    def _get_player_info(self, player_id: str) -> dict:
+    async def _get_player_info(self, player_id: str) -> dict:
         """Obtiene información básica de un jugador."""
         player = self._players.get(player_id)
-        if not player:
+        if player:
+            return player.info
+        record = await self._backend.get_player(player_id)
+        if not record:
             return {"id": player_id, "name": "Desconocido", "connected": False}
-        return {
-            "id": player.id,
-            "name": player.name,
-            "connected": player.connected
-        }
+        return {"id": record["id"], "name": record["name"], "connected": record["connected"]}
+
+    async def _stats_identity(self, player_id: str) -> dict:
+        """{"id": clave estable (o None), "name"} de un jugador, para el ranking."""
+        player = self._players.get(player_id)
+        if player:
+            return {"id": player.stats_key, "name": player.name}
+        record = await self._backend.get_player(player_id)
+        if not record:
+            return {"id": None, "name": "Desconocido"}
+        return {"id": record.get("stats_key"), "name": record["name"]}
+
+    async def _handle_send_failure(self, player: PlayerConnection):
+        """El escritor de un jugador falló o su cola se desbordó."""
+        self._send_failures.inc()
+        await self._handle_disconnect(player)
 
     async def _handle_disconnect(self, player: PlayerConnection):
         """Maneja la desconexión de un jugador."""
-        if not player:
+        if not player or not player.connected:
+            # Ya se procesó (p. ej. el escritor falló antes de que cerrara el socket)
             return
 
         player.connected = False
+        player.stop_writer()
+        await self._backend.save_player(player.id, player.name, player.game_id, False,
+                                        player.stats_key)
         logger.info(f"Jugador {player.name} desconectado")
 
         # Notificar a otros jugadores en la partida
         if player.game_id:
-            game = self.games.get(player.game_id)
-            if game:
-                await self._broadcast_game_state(game)
+            async with self._game_lock(player.game_id):
+                game = await self._find_game(player.game_id)
+                if game:
+                    await self._broadcast_game_state(game)
 
-        # Si el jugador estaba esperando, limpiar el estado de espera
-        if self._waiting_player == player.id:
-            self._waiting_player = None
+        # Si el jugador estaba esperando, sacarlo de la cola (O(1)) y de la espera compartida
+        self._matchmaking.remove(player.id)
+        self._offered_waiting.pop(player.id, None)
+        await self._backend.remove_waiting(player.id)
 
         # Iniciar temporizador para limpiar el jugador si no se reconecta
-        asyncio.create_task(self._schedule_player_cleanup(player))
+        # (reprogramar la misma clave reemplaza el temporizador anterior)
+        self._timers.schedule(
+            ("cleanup", player.id), CLEANUP_DELAY,
+            functools.partial(self._cleanup_player, player.id)
+        )
 
-    async def _schedule_player_cleanup(self, player: PlayerConnection):
-        """Programa la limpieza de un jugador después de un tiempo si no se reconecta."""
-        await asyncio.sleep(300)  # 5 minutos
+    async def _cleanup_player(self, player_id: str):
+        """Limpia a un jugador que no se reconectó a tiempo."""
+        player = self._players.get(player_id)
 
         # Si el jugador sigue desconectado, limpiar
-        if player.id in self._players and not player.connected:
-            # Limpiar la partida si existe
-            if player.game_id and player.game_id in self.games:
-                game = self.games[player.game_id]
-                # Notificar al otro jugador antes de limpiar
-                other_player_id = game.player_o if game.player_x == player.id else game.player_x
-                if other_player_id:
-                    other_player = self._players.get(other_player_id)
-                    if other_player and other_player.connected:
-                        await other_player.send({
-                            "type": mt.MessageType.GAME_ABANDONED.value,
-                            "message": f"El jugador {player.name} ha abandonado la partida"
-                        })
-                # Eliminar la partida
-                del self.games[player.game_id]
-
-            # Eliminar el jugador
-            del self._players[player.id]
-            logger.info(f"Jugador {player.name} eliminado por inactividad")
\ No newline at end of file
+        if not player or player.connected:
+            return
+        # Limpiar la partida si existe
+        game_id = player.game_id
+        if game_id:
+            async with self._game_lock(game_id):
+                if player.connected:
+                    # Se reconectó mientras esperaba el lock
+                    return
+                await self._delete_game(player, game_id)
+            self._game_locks.pop(game_id, None)
+
+        # Eliminar el jugador
+        del self._players[player.id]
+        for limiter in self._rate_limiters:
+            limiter.forget(player.id)
+        await self._backend.delete_player(player.id)
+        logger.info(f"Jugador {player.name} eliminado por inactividad")
+
+    async def _delete_game(self, player: PlayerConnection, game_id: str):
+        """Elimina la partida abandonada por `player` y avisa al rival y a los espectadores."""
+        game = await self._get_game(game_id)
+        if not game:
+            return
+        # Notificar al otro jugador antes de limpiar
+        other_player_id = game.player_o if game.player_x == player.id else game.player_x
+        if other_player_id:
+            await self._send_to_player(other_player_id, game.id, {
+                "type": mt.MessageType.GAME_ABANDONED.value,
+                "message": f"El jugador {player.name} ha abandonado la partida"
+            })
+        # Eliminar la partida
+        self._spectators.close_game(game.id, {
+            "type": mt.MessageType.GAME_ABANDONED.value,
+            "message": f"El jugador {player.name} ha abandonado la partida"
+        })
+        self.games.pop(game.id, None)
+        self._chat_history.pop(game.id, None)
+        self._chat_pending.pop(game.id, None)
+        flush_task = self._chat_flush_tasks.pop(game.id, None)
+        if flush_task:
+            flush_task.cancel()
+        await self._backend.delete_game(game.id)
+        self._log({"op": "delete", "id": game.id})
+
+    # ----- Single-player (vs IA) -----
+
+    def _single_player_payload(self, game: Game) -> dict:
+        """Estado de una partida single-player con el formato que espera sp.js."""
+        return {
+            "gameId": game.id,
+            "board": game.board,
+            "turn": game.turn,
+            "wins": game.wins,
+            "winner": game.winner,
+            "draw": game.is_draw,
+            "matchFinished": max(game.wins.values()) >= MATCH_WINS,
+            "difficulty": self._single_player_difficulty.get(game.id, "hard"),
+            "size": game.size,
+            "winLength": game.win_length
+        }
+
+    def single_player_board_size(self, game_id: str) -> Optional[int]:
+        """Lado del tablero de la partida (None si no existe)."""
+        game = self._single_player_games.get(game_id)
+        return game.size if game else None
+
+    async def create_single_player_game(self, difficulty: str = "hard", size: int = 3,
+                                        win_length: Optional[int] = None) -> dict:
+        """Crea una partida contra la IA; el humano juega con X y empieza."""
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"Dificultad inválida: {difficulty}")
+        if not 3 <= size <= MAX_BOARD_SIZE:
+            raise ValueError(f"El tablero debe medir entre 3 y {MAX_BOARD_SIZE}")
+        game = Game(player_x=AIPlayer.HUMAN.value, player_o=AIPlayer.COMPUTER.value,
+                    size=size, win_length=win_length)
+        # El endpoint no requiere sesión: al llegar al máximo se descarta la menos usada
+        while len(self._single_player_games) >= self._max_single_player_games:
+            oldest_id = next(iter(self._single_player_games))
+            self._discard_single_player_game(oldest_id)
+        self._single_player_games[game.id] = game
+        self._single_player_difficulty[game.id] = difficulty
+        self._touch_single_player_game(game.id)
+        logger.info(f"Nueva partida single-player {game.id} ({difficulty})")
+        return self._single_player_payload(game)
+
+    def _touch_single_player_game(self, game_id: str) -> Game:
+        """Partida contra la IA en uso: reinicia su TTL. KeyError si ya no existe."""
+        game = self._single_player_games[game_id]
+        self._single_player_games.move_to_end(game_id)
+        self._timers.schedule(
+            ("single_player", game_id), self._single_player_ttl,
+            functools.partial(self._expire_single_player_game, game_id)
+        )
+        return game
+
+    async def _expire_single_player_game(self, game_id: str):
+        logger.info(f"Partida single-player {game_id} descartada por inactividad")
+        self._discard_single_player_game(game_id)
+
+    def _discard_single_player_game(self, game_id: str):
+        self._single_player_games.pop(game_id, None)
+        self._single_player_difficulty.pop(game_id, None)
+        self._timers.cancel(("single_player", game_id))
+
+    async def handle_single_player_move(self, game_id: str, position: int) -> dict:
+        """Aplica el movimiento del humano y, si la ronda sigue, responde la IA."""
+        game = self._touch_single_player_game(game_id)
+        if game.turn != AIPlayer.HUMAN.value or not game.make_move(position):
+            raise ValueError("Casilla ya ocupada o movimiento inválido")
+
+        if not game.finished:
+            await self.get_ai_move(game_id)
+        return self._single_player_payload(game)
+
+    async def get_ai_move(self, game_id: str) -> dict:
+        """Calcula y aplica el movimiento de la IA."""
+        game = self._single_player_games.get(game_id)
+        if not game:
+            raise KeyError(game_id)
+        if game.finished or game.turn != AIPlayer.COMPUTER.value:
+            return self._single_player_payload(game)
+        difficulty = self._single_player_difficulty.get(game_id, "hard")
+        seq = game.seq
+        position = await self._ai.choose_move(game, difficulty)
+        # Si la partida se reinició mientras la IA pensaba, la jugada ya no aplica
+        if game.seq == seq:
+            game.make_move(position)
+        return self._single_player_payload(game)
+
+    async def reset_single_player_game(self, game_id: str) -> dict:
+        """Nueva ronda conservando el contador de victorias."""
+        game = self._touch_single_player_game(game_id)
+        game.reset()
+        return self._single_player_payload(game)
+
+    async def reset_single_player_match(self, game_id: str) -> dict:
+        """Nueva serie: reinicia tablero y victorias."""
+        game = self._touch_single_player_game(game_id)
+        game.reset_match()
+        return self._single_player_payload(game)
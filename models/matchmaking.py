@@ -0,0 +1,177 @@
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+
+
+class QueueEntry:
+    """Jugador en la cola de emparejamiento."""
+
+    __slots__ = ("player_id", "bucket", "enqueued_at")
+
+    def __init__(self, player_id: str, bucket: Hashable, enqueued_at: float):
+        self.player_id = player_id
+        self.bucket = bucket
+        self.enqueued_at = enqueued_at
+
+
+# Clave de la espera compartida para quienes ya aceptan rival de cualquier bucket
+RELAXED_BUCKET = "*"
+
+
+class MatchmakingQueue:
+    """Cola FIFO de emparejamiento con buckets opcionales.
+
+    Cada bucket (banda de rating, región, nivel de latencia) es un OrderedDict
+    player_id -> QueueEntry: conserva el orden de llegada y permite sacar a un
+    jugador desconectado en O(1). El emparejamiento se hace por lotes en cada
+    tick con `pop_pairs`; quien espera más de `relax_after` segundos sin rival
+    en su bucket se empareja con cualquier otro jugador en la misma situación.
+    Las mismas reglas valen entre workers con `shared_bucket`.
+    """
+
+    def __init__(self, rating_band: int = 200, latency_tiers: Tuple[int, ...] = (60, 150),
+                 relax_after: float = 10.0, samples: int = 1024):
+        self.rating_band = rating_band
+        self.latency_tiers = latency_tiers
+        self.relax_after = relax_after
+        self._buckets: Dict[Hashable, "OrderedDict[str, QueueEntry]"] = {}
+        self._entries: Dict[str, QueueEntry] = {}
+        # Métricas
+        self.matches_made = 0
+        self._matched_players = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_samples: Deque[float] = deque(maxlen=samples)
+
+    def bucket_for(self, region: Optional[str] = None, rating: Optional[int] = None,
+                   rtt_ms: Optional[float] = None) -> Hashable:
+        """Bucket de un jugador a partir de sus atributos (todos opcionales)."""
+        band = rating // self.rating_band if rating is not None else None
+        tier = None
+        if rtt_ms is not None:
+            tier = sum(1 for limit in self.latency_tiers if rtt_ms > limit)
+        return (region, band, tier)
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def enqueue(self, player_id: str, bucket: Hashable = None, now: Optional[float] = None):
+        """Agrega un jugador al final de su bucket (no hace nada si ya está)."""
+        if player_id in self._entries:
+            return
+        entry = QueueEntry(player_id, bucket, time.monotonic() if now is None else now)
+        self._entries[player_id] = entry
+        self._buckets.setdefault(bucket, OrderedDict())[player_id] = entry
+
+    def requeue(self, entry: QueueEntry):
+        """Devuelve una entrada al frente de su bucket conservando su antigüedad."""
+        if entry.player_id in self._entries:
+            return
+        self._entries[entry.player_id] = entry
+        bucket = self._buckets.setdefault(entry.bucket, OrderedDict())
+        bucket[entry.player_id] = entry
+        bucket.move_to_end(entry.player_id, last=False)
+
+    def remove(self, player_id: str) -> bool:
+        """Saca a un jugador de la cola en O(1)."""
+        entry = self._entries.pop(player_id, None)
+        if entry is None:
+            return False
+        bucket = self._buckets[entry.bucket]
+        del bucket[player_id]
+        if not bucket:
+            del self._buckets[entry.bucket]
+        return True
+
+    def update_latency(self, player_id: str, rtt_ms: float) -> bool:
+        """Mueve a un jugador en espera al nivel de latencia que indica su RTT.
+
+        Conserva su antigüedad; retorna True si cambió de bucket.
+        """
+        entry = self._entries.get(player_id)
+        if entry is None or not isinstance(entry.bucket, tuple) or len(entry.bucket) != 3:
+            return False
+        region, band, _ = entry.bucket
+        bucket = (region, band, self.bucket_for(rtt_ms=rtt_ms)[2])
+        if bucket == entry.bucket:
+            return False
+        self.remove(player_id)
+        entry.bucket = bucket
+        self._entries[player_id] = entry
+        self._buckets.setdefault(bucket, OrderedDict())[player_id] = entry
+        return True
+
+    def pop_pairs(self, now: Optional[float] = None) -> List[Tuple[QueueEntry, QueueEntry]]:
+        """Pasada de emparejamiento por lotes; el primero de cada par juega con X."""
+        now = time.monotonic() if now is None else now
+        pairs = []
+        leftovers = []
+        for key in list(self._buckets):
+            bucket = self._buckets[key]
+            while len(bucket) >= 2:
+                _, first = bucket.popitem(last=False)
+                _, second = bucket.popitem(last=False)
+                pairs.append((first, second))
+            if bucket:
+                entry = next(iter(bucket.values()))
+                if now - entry.enqueued_at >= self.relax_after:
+                    leftovers.append(entry)
+            else:
+                del self._buckets[key]
+
+        # Quienes llevan mucho tiempo solos en su bucket se emparejan entre sí
+        leftovers.sort(key=lambda e: e.enqueued_at)
+        for i in range(0, len(leftovers) - 1, 2):
+            first, second = leftovers[i], leftovers[i + 1]
+            for entry in (first, second):
+                bucket = self._buckets[entry.bucket]
+                del bucket[entry.player_id]
+                if not bucket:
+                    del self._buckets[entry.bucket]
+            pairs.append((first, second))
+
+        for first, second in pairs:
+            del self._entries[first.player_id]
+            del self._entries[second.player_id]
+        return pairs
+
+    def shared_bucket(self, entry: QueueEntry, now: Optional[float] = None) -> str:
+        """Clave con la que se publica la entrada en la espera compartida del backend."""
+        now = time.monotonic() if now is None else now
+        if now - entry.enqueued_at >= self.relax_after:
+            return RELAXED_BUCKET
+        return str(entry.bucket)
+
+    def waiting_entries(self) -> List[QueueEntry]:
+        """Entradas que siguen en la cola, en orden de llegada por bucket."""
+        return [entry for bucket in self._buckets.values() for entry in bucket.values()]
+
+    def record_match(self, *entries: QueueEntry, now: Optional[float] = None):
+        """Registra un emparejamiento y la espera de los jugadores locales que incluye."""
+        now = time.monotonic() if now is None else now
+        self.matches_made += 1
+        for entry in entries:
+            self._matched_players += 1
+            wait = now - entry.enqueued_at
+            self._wait_total += wait
+            self._wait_samples.append(wait)
+            if wait > self._wait_max:
+                self._wait_max = wait
+
+    def metrics(self) -> dict:
+        """Profundidad de la cola y tiempos de espera hasta el emparejamiento."""
+        samples = sorted(self._wait_samples)
+        return {
+            "queue_depth": len(self._entries),
+            "buckets": {str(key): len(bucket) for key, bucket in self._buckets.items()},
+            "matches_made": self.matches_made,
+            "time_to_match_avg": (
+                self._wait_total / self._matched_players if self._matched_players else 0.0
+            ),
+            "time_to_match_p50": samples[len(samples) // 2] if samples else 0.0,
+            "time_to_match_p99": samples[int(len(samples) * 0.99)] if samples else 0.0,
+            "time_to_match_max": self._wait_max
+        }
@@ -0,0 +1,218 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from models.game import Game
+from utils.json_codec import encode_message
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "snapshot.json"
+SEGMENT_PATTERN = "segment-*.log"
+
+
+def _segment_name(number: int) -> str:
+    return f"segment-{number:08d}.log"
+
+
+def _segment_number(path: str) -> int:
+    return int(os.path.basename(path)[len("segment-"):-len(".log")])
+
+
+class MoveLog:
+    """Log de movimientos append-only con group commit y snapshots compactos.
+
+    `append` solo serializa el registro y lo deja en memoria; una tarea lo
+    escribe cada `flush_interval` segundos desde un hilo dedicado, con un único
+    fsync por lote. Cada snapshot abre un segmento nuevo y borra los anteriores,
+    así que al arrancar solo se reproduce el snapshot más la cola del log.
+
+    Registros:
+        {"op": "game", "game": {...}, "players": {id: nombre}}  (solo locales)
+        {"op": "move", "id": game_id, "pos": casilla}
+        {"op": "reset", "id": game_id}
+        {"op": "delete", "id": game_id}
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 0.05):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._pending: List[object] = []  # Líneas JSON o marcadores de snapshot
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="move-log")
+        self._file = None
+        self._segment = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self.records_written = 0
+        self.batches_written = 0
+
+    # ----- Recuperación -----
+
+    def recover(self) -> Tuple[Dict[str, Game], Dict[str, dict]]:
+        """Reconstruye partidas y jugadores desde el snapshot y la cola del log.
+
+        Retorna (game_id -> Game, player_id -> {"name", "game_id"}). Se llama
+        una vez al arrancar, antes de `start`.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        games: Dict[str, Game] = {}
+        players: Dict[str, dict] = {}
+        first_segment = 0
+
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            games = {data["id"]: Game.from_dict(data) for data in snapshot["games"]}
+            players = snapshot["players"]
+            first_segment = snapshot["segment"]
+
+        segments = sorted(
+            glob.glob(os.path.join(self.directory, SEGMENT_PATTERN)), key=_segment_number
+        )
+        replayed = 0
+        for path in segments:
+            if _segment_number(path) < first_segment:
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Línea truncada por una caída: es el final del log
+                        break
+                    self._apply(record, games, players)
+                    replayed += 1
+
+        # Después de recuperar se escribe siempre en un segmento nuevo
+        last = max([_segment_number(p) for p in segments] + [first_segment])
+        self._segment = last + 1
+        logger.info(f"Log recuperado: {len(games)} partidas, {replayed} registros reproducidos")
+        return games, players
+
+    @staticmethod
+    def _apply(record: dict, games: Dict[str, Game], players: Dict[str, dict]):
+        op = record["op"]
+        if op == "game":
+            game = Game.from_dict(record["game"])
+            games[game.id] = game
+            for player_id, name in record["players"].items():
+                # Logs anteriores guardaban None para los rivales de otro worker
+                if name is not None:
+                    players[player_id] = {"name": name, "game_id": game.id}
+        elif op == "move":
+            game = games.get(record["id"])
+            if game:
+                game.make_move(record["pos"])
+        elif op == "reset":
+            game = games.get(record["id"])
+            if game:
+                game.reset()
+        elif op == "delete":
+            game = games.pop(record["id"], None)
+            if game:
+                players.pop(game.player_x, None)
+                players.pop(game.player_o, None)
+
+    # ----- Escritura -----
+
+    async def start(self):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._open_segment)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close_segment)
+        self._executor.shutdown(wait=True)
+
+    def append(self, record: dict):
+        """Encola un registro; se escribe en el siguiente group commit."""
+        self._pending.append(encode_message(record) + "\n")
+
+    def snapshot(self, games: List[dict], players: Dict[str, dict]):
+        """Encola un snapshot del estado actual.
+
+        Se procesa en orden con los registros: los anteriores quedan en el
+        segmento actual y los posteriores van al segmento nuevo.
+        """
+        # Se serializa aquí: los dicts de las partidas siguen cambiando después
+        self._pending.append(_Snapshot(encode_message({"games": games, "players": players})))
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._write_batch, batch)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Error escribiendo el log de movimientos")
+
+    # ----- Hilo del log -----
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, _segment_name(self._segment))
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def _write_batch(self, batch: List[object]):
+        lines = []
+        for item in batch:
+            if isinstance(item, _Snapshot):
+                self._file.writelines(lines)
+                lines = []
+                self._rotate(item)
+            else:
+                lines.append(item)
+        if lines:
+            self._file.writelines(lines)
+            self.records_written += len(lines)
+        # Un solo fsync para todo el lote
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.batches_written += 1
+
+    def _rotate(self, snapshot: "_Snapshot"):
+        """Cierra el segmento, escribe el snapshot y borra los segmentos viejos."""
+        self._close_segment()
+        old_segment = self._segment
+        self._segment += 1
+        self._open_segment()
+
+        # El snapshot indica desde qué segmento hay que reproducir
+        data = f'{{"segment":{self._segment},' + snapshot.data[1:]
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        for segment in glob.glob(os.path.join(self.directory, SEGMENT_PATTERN)):
+            if _segment_number(segment) <= old_segment:
+                os.remove(segment)
+
+
+class _Snapshot:
+    __slots__ = ("data",)
+
+    def __init__(self, data: str):
+        self.data = data
@@ -1,22 +1,200 @@
-import uuid
-from typing import Optional
+import asyncio
+import logging
+from collections import deque
+from enum import Enum
+from typing import Awaitable, Callable, Deque, Optional, Tuple
+
+from utils.ids import new_id
+from utils.json_codec import encode_message
+
+logger = logging.getLogger(__name__)
+
+
+class BackpressurePolicy(Enum):
+    """Qué hacer cuando la cola de salida de un jugador está llena."""
+    DROP_OLDEST = "drop_oldest"  # Descartar los snapshots y deltas ya superados
+    DISCONNECT = "disconnect"    # Cerrar la conexión del cliente lento
+
+
+class FrameKind(Enum):
+    """Tipo de frame en la cola de salida: decide cuáles se pueden descartar."""
+    CONTROL = 0  # Nunca se descarta (registered, game_over, error, chat...)
+    DELTA = 1    # Cambio incremental: solo lo supera un snapshot posterior
+    STATE = 2    # Snapshot completo: supera a los snapshots y deltas anteriores
+
+
+DEFAULT_SEND_QUEUE_SIZE = 64
+# Con DROP_OLDEST y nada descartable, la cola crece hasta este múltiplo del
+# máximo antes de desconectar (el cliente reanuda y recibe un snapshot)
+QUEUE_HARD_LIMIT_FACTOR = 2
 
 
 class PlayerConnection:
-    def __init__(self, websocket, name: Optional[str] = None):
+    # Sin __dict__ por instancia: con decenas de miles de jugadores se nota
+    __slots__ = (
+        "websocket", "id", "name", "symbol", "game_id", "_connected", "delta_mode",
+        "_info", "stats_key", "ping_sent_at", "missed_beats", "rtt", "max_queue", "policy",
+        "dropped_frames", "_queue", "_writer_task", "_failure_task",
+        "on_send_failure", "on_frames_dropped",
+    )
+
+    def __init__(self, websocket, name: Optional[str] = None,
+                 max_queue: int = DEFAULT_SEND_QUEUE_SIZE,
+                 policy: BackpressurePolicy = BackpressurePolicy.DROP_OLDEST):
         self.websocket = websocket
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.name = name or f"Player-{self.id[:8]}"
         self.symbol: Optional[str] = None
         self.game_id: Optional[str] = None
-        self.connected: bool = True
+        self._connected: bool = True
+        self.delta_mode: bool = False  # Recibe deltas en lugar de snapshots completos
+        self._info: Optional[dict] = None  # Caché de la info pública del jugador
+        # Id estable de su clave de jugador: identidad de sus estadísticas
+        self.stats_key: Optional[str] = None
+        # Heartbeat: ping sin respuesta, latidos perdidos seguidos y RTT suavizado (s)
+        self.ping_sent_at: Optional[float] = None
+        self.missed_beats = 0
+        self.rtt: Optional[float] = None
+
+        # Cola de salida acotada que vacía una tarea escritora propia
+        self.max_queue = max_queue
+        self.policy = policy
+        self.dropped_frames = 0
+        # La cola y su tarea escritora existen solo mientras hay frames por
+        # enviar: un jugador inactivo (o restaurado, o desconectado) no las tiene
+        self._queue: Optional[Deque[Tuple[FrameKind, str]]] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._failure_task: Optional[asyncio.Task] = None
+        # Callbacks del GameManager: envío fallido o cola desbordada, y
+        # frames descartados por contrapresión (para la métrica)
+        self.on_send_failure: Optional[Callable[["PlayerConnection"], Awaitable[None]]] = None
+        self.on_frames_dropped: Optional[Callable[[int], None]] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    @connected.setter
+    def connected(self, value: bool):
+        if value != self._connected:
+            self._connected = value
+            self._info = None
+
+    @property
+    def info(self) -> dict:
+        """Información pública del jugador; se reconstruye solo cuando cambia."""
+        if self._info is None:
+            self._info = {"id": self.id, "name": self.name, "connected": self._connected}
+        return self._info
+
+    @property
+    def queued_frames(self) -> int:
+        return len(self._queue) if self._queue else 0
 
     async def send(self, message: dict):
-        """Enviar JSON al websocket del jugador (si está conectado)."""
-        if self.connected and self.websocket:
-            await self.websocket.send_json(message)
+        """Encolar un mensaje JSON para el jugador (si está conectado)."""
+        self.enqueue(encode_message(message))
+
+    async def send_text(self, frame: str):
+        """Encolar un frame JSON ya serializado (si está conectado)."""
+        self.enqueue(frame)
+
+    def enqueue(self, frame: str, kind: FrameKind = FrameKind.CONTROL) -> bool:
+        """Agrega un frame a la cola de salida sin esperar al socket.
+
+        Con la cola llena y DROP_OLDEST, un snapshot nuevo descarta los
+        snapshots y deltas pendientes (ya superados); los frames de control
+        no se descartan nunca. Retorna False si el frame no se encoló
+        (jugador desconectado o cliente desconectado por la cola llena).
+        """
+        if not self._connected or not self.websocket:
+            return False
+        if self._queue is None:
+            self._queue = deque()
+
+        if len(self._queue) >= self.max_queue:
+            dropped = 0
+            if self.policy is BackpressurePolicy.DROP_OLDEST and kind is FrameKind.STATE:
+                dropped = self._drop_superseded()
+            if self.policy is BackpressurePolicy.DISCONNECT or (
+                    not dropped
+                    and len(self._queue) >= self.max_queue * QUEUE_HARD_LIMIT_FACTOR):
+                logger.warning(f"Cola de salida llena para {self.name}; desconectando")
+                self._fail(close=True)
+                return False
+
+        self._queue.append((kind, frame))
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer())
+        return True
+
+    async def _writer(self):
+        """Envía los frames en orden; un socket lento solo se retrasa a sí mismo.
+
+        Al vaciar la cola termina y la suelta; el siguiente `enqueue` crea
+        ambas de nuevo.
+        """
+        queue = self._queue
+        while queue:
+            _, frame = queue.popleft()
+            try:
+                await self.websocket.send_text(frame)
+            except Exception as e:
+                logger.error(f"Error al enviar mensaje a {self.name}: {str(e)}")
+                self._writer_task = None
+                self._fail()
+                return
+        # Sin await desde el último chequeo: ningún frame quedó sin tarea
+        self._writer_task = None
+        self._queue = None
+
+    def _drop_superseded(self) -> int:
+        """Saca de la cola los snapshots y deltas pendientes; retorna cuántos."""
+        queue = self._queue
+        kept = [item for item in queue if item[0] is FrameKind.CONTROL]
+        dropped = len(queue) - len(kept)
+        if dropped:
+            # En el mismo deque: la tarea escritora guarda una referencia
+            queue.clear()
+            queue.extend(kept)
+            self.dropped_frames += dropped
+            if self.on_frames_dropped is not None:
+                self.on_frames_dropped(dropped)
+        return dropped
+
+    def _fail(self, close: bool = False):
+        """Descarta la cola y avisa al gestor para que procese la desconexión."""
+        if self._queue:
+            self._queue.clear()
+        if self._failure_task is None:
+            # Referencia guardada: la tarea no puede recolectarse antes de terminar
+            self._failure_task = asyncio.create_task(self._handle_failure(self.websocket, close))
+
+    async def _handle_failure(self, websocket, close: bool):
+        try:
+            if close:
+                self.stop_writer()
+                try:
+                    await websocket.close()
+                except Exception:
+                    pass
+            # Si la sesión ya se reanudó en otro socket, la falla era del viejo
+            if self.on_send_failure is not None and self.websocket is websocket:
+                await self.on_send_failure(self)
+        finally:
+            self._failure_task = None
+
+    def stop_writer(self):
+        """Detiene la tarea escritora y descarta los frames pendientes."""
+        if self._queue:
+            self._queue.clear()
+        self._queue = None
+        task, self._writer_task = self._writer_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
 
     async def close(self):
+        self.stop_writer()
         try:
             await self.websocket.close()
         except Exception:
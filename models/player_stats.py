@@ -0,0 +1,321 @@
+import asyncio
+import bisect
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Segundos entre escrituras por lotes al archivo SQLite
+STATS_FLUSH_INTERVAL = 1.0
+# Puntos por resultado para ordenar el ranking
+POINTS_WIN = 3
+POINTS_DRAW = 1
+# Nombres que no identifican a nadie: el predeterminado del cliente web y
+# el de jugadores remotos sin registro
+ANONYMOUS_NAMES = frozenset({"Jugador", "Desconocido"})
+# Prefijo de los nombres que se generan para quien no manda uno (Player-<id>)
+GENERATED_NAME_PREFIX = "Player-"
+
+
+def is_ranked(info: dict) -> bool:
+    """Si un jugador ({"id", "name"}) eligió un nombre y puede entrar al ranking.
+
+    Los nombres generados (Player-<id>) y los predeterminados no cuentan.
+    """
+    name = info.get("name")
+    return (bool(name) and name not in ANONYMOUS_NAMES
+            and not name.startswith(GENERATED_NAME_PREFIX))
+
+
+class PlayerStats:
+    """Resultados acumulados de un jugador, identificado por su clave estable.
+
+    El id es el de la clave de jugador que el cliente guarda entre sesiones
+    (no el playerId, que cambia con cada conexión); usarla exige su firma.
+    El nombre es solo para mostrar: el último con el que jugó.
+    """
+
+    __slots__ = ("player_id", "name", "wins", "losses", "draws")
+
+    def __init__(self, player_id: str, name: str, wins: int = 0, losses: int = 0,
+                 draws: int = 0):
+        self.player_id = player_id
+        self.name = name
+        self.wins = wins
+        self.losses = losses
+        self.draws = draws
+
+    @property
+    def points(self) -> int:
+        return self.wins * POINTS_WIN + self.draws * POINTS_DRAW
+
+    @property
+    def key(self) -> tuple:
+        """Clave de orden del ranking: más puntos, más victorias, menos derrotas."""
+        return (-self.points, -self.wins, self.losses, self.player_id)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.player_id,
+            "name": self.name,
+            "wins": self.wins,
+            "losses": self.losses,
+            "draws": self.draws,
+            "games": self.wins + self.losses + self.draws,
+            "points": self.points,
+        }
+
+
+class Leaderboard:
+    """Ranking ordenado que se actualiza por jugador, sin reordenar todo.
+
+    Las claves de orden se guardan en una lista ordenada partida en tramos
+    de hasta 2 * BUCKET_SIZE (como un skip list de un nivel): cambiar los
+    resultados de un jugador es quitar su clave vieja e insertar la nueva
+    con bisect, moviendo solo un tramo; el top-K recorre los primeros.
+    """
+
+    BUCKET_SIZE = 512
+
+    def __init__(self):
+        self._buckets: List[List[tuple]] = []
+        self._maxes: List[tuple] = []  # Última clave de cada tramo
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def load(self, stats: List[PlayerStats]):
+        keys = sorted(s.key for s in stats)
+        size = self.BUCKET_SIZE
+        self._buckets = [keys[i:i + size] for i in range(0, len(keys), size)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._size = len(keys)
+
+    def update(self, old_key: Optional[tuple], new_key: tuple):
+        if old_key is not None:
+            self._remove(old_key)
+        self._insert(new_key)
+
+    def _insert(self, key: tuple):
+        self._size += 1
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            return
+        index = bisect.bisect_left(self._maxes, key)
+        if index == len(self._buckets):
+            index -= 1
+            self._buckets[index].append(key)
+            self._maxes[index] = key
+        else:
+            bisect.insort(self._buckets[index], key)
+        bucket = self._buckets[index]
+        if len(bucket) > 2 * self.BUCKET_SIZE:
+            # Partir el tramo en dos mitades
+            half = bucket[self.BUCKET_SIZE:]
+            del bucket[self.BUCKET_SIZE:]
+            self._buckets.insert(index + 1, half)
+            self._maxes[index] = bucket[-1]
+            self._maxes.insert(index + 1, half[-1])
+
+    def _remove(self, key: tuple):
+        index = bisect.bisect_left(self._maxes, key)
+        if index == len(self._buckets):
+            return
+        bucket = self._buckets[index]
+        position = bisect.bisect_left(bucket, key)
+        if position == len(bucket) or bucket[position] != key:
+            return
+        del bucket[position]
+        self._size -= 1
+        if not bucket:
+            del self._buckets[index]
+            del self._maxes[index]
+        elif position == len(bucket):
+            self._maxes[index] = bucket[-1]
+
+    def top(self, limit: int) -> List[str]:
+        """Ids de los primeros `limit` jugadores."""
+        ids = []
+        for bucket in self._buckets:
+            for key in bucket:
+                if len(ids) == limit:
+                    return ids
+                ids.append(key[-1])
+        return ids
+
+    def rank(self, key: tuple) -> int:
+        """Posición (desde 1) de la clave en el ranking."""
+        index = bisect.bisect_left(self._maxes, key)
+        before = sum(len(bucket) for bucket in self._buckets[:index])
+        if index == len(self._buckets):
+            return before + 1
+        return before + bisect.bisect_left(self._buckets[index], key) + 1
+
+
+class StatsStore:
+    """Estadísticas por jugador persistidas en SQLite con lecturas en memoria.
+
+    Al arrancar se cargan todas en memoria; cada fin de ronda actualiza la
+    caché y el ranking al instante y acumula el cambio, que una tarea
+    escribe por lotes (una transacción por intervalo) en un hilo aparte.
+    Las escrituras suman deltas, así varios workers pueden compartir el
+    archivo; cada uno lee su caché (lo del disco al arrancar más lo suyo).
+    Sin `path` las estadísticas viven solo en memoria. El GameManager solo
+    registra partidas entre jugadores con clave y nombre propio (`is_ranked`).
+    """
+
+    def __init__(self, path: Optional[str] = None,
+                 flush_interval: float = STATS_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._stats: Dict[str, PlayerStats] = {}
+        self._leaderboard = Leaderboard()
+        # Cambios pendientes de escribir: id -> [nombre, victorias, derrotas, empates]
+        self._pending: Dict[str, list] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def start(self):
+        if not self.path:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="player-stats")
+        rows = await self._run(self._connect)
+        for player_id, name, wins, losses, draws in rows:
+            self._stats[player_id] = PlayerStats(player_id, name, wins, losses, draws)
+        self._leaderboard.load(list(self._stats.values()))
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info(f"Estadísticas de {len(self._stats)} jugadores cargadas de {self.path}")
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._conn is not None:
+            await self.flush()
+            await self._run(self._conn.close)
+            self._conn = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _connect(self) -> List[Tuple[str, str, int, int, int]]:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        # Por clave de jugador; las tablas anteriores (player_stats por nombre,
+        # player_results por playerId de una sola conexión) ya no se leen
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS player_key_results ("
+            "player_key TEXT PRIMARY KEY, name TEXT NOT NULL, wins INTEGER NOT NULL, "
+            "losses INTEGER NOT NULL, draws INTEGER NOT NULL)"
+        )
+        conn.commit()
+        self._conn = conn
+        return conn.execute(
+            "SELECT player_key, name, wins, losses, draws FROM player_key_results"
+        ).fetchall()
+
+    # ----- Escritura (camino caliente: solo memoria) -----
+
+    def record_win(self, winner: dict, loser: dict):
+        """Registra una victoria; cada jugador es {"id", "name"}."""
+        self._add(winner["id"], winner["name"], 1, 0, 0)
+        self._add(loser["id"], loser["name"], 0, 1, 0)
+
+    def record_draw(self, first: dict, second: dict):
+        self._add(first["id"], first["name"], 0, 0, 1)
+        self._add(second["id"], second["name"], 0, 0, 1)
+
+    def _add(self, player_id: str, name: str, wins: int, losses: int, draws: int):
+        stats = self._stats.get(player_id)
+        if stats is None:
+            stats = self._stats[player_id] = PlayerStats(player_id, name)
+            old_key = None
+        else:
+            stats.name = name
+            old_key = stats.key
+        stats.wins += wins
+        stats.losses += losses
+        stats.draws += draws
+        self._leaderboard.update(old_key, stats.key)
+        if self.path:
+            pending = self._pending.get(player_id)
+            if pending is None:
+                self._pending[player_id] = [name, wins, losses, draws]
+            else:
+                pending[0] = name
+                pending[1] += wins
+                pending[2] += losses
+                pending[3] += draws
+
+    # ----- Lectura (solo memoria) -----
+
+    def top(self, limit: int = 10) -> List[dict]:
+        result = []
+        for rank, player_id in enumerate(self._leaderboard.top(limit), 1):
+            entry = self._stats[player_id].to_dict()
+            entry["rank"] = rank
+            result.append(entry)
+        return result
+
+    def get(self, player_id: str) -> Optional[dict]:
+        stats = self._stats.get(player_id)
+        if stats is None:
+            return None
+        entry = stats.to_dict()
+        entry["rank"] = self._leaderboard.rank(stats.key)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    # ----- Persistencia por lotes -----
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error al guardar estadísticas: {str(e)}")
+
+    async def flush(self):
+        if not self._pending or self._conn is None:
+            return
+        rows = [(player_id, *delta) for player_id, delta in self._pending.items()]
+        self._pending = {}
+        try:
+            await self._run(self._write, rows)
+        except Exception:
+            # Devolver los cambios para el siguiente intento (sin pisar los nuevos)
+            for player_id, name, wins, losses, draws in rows:
+                pending = self._pending.setdefault(player_id, [name, 0, 0, 0])
+                pending[1] += wins
+                pending[2] += losses
+                pending[3] += draws
+            raise
+
+    def _write(self, rows: List[Tuple[str, str, int, int, int]]):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO player_key_results (player_key, name, wins, losses, draws) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(player_key) DO UPDATE SET name = excluded.name, "
+                "wins = wins + excluded.wins, losses = losses + excluded.losses, "
+                "draws = draws + excluded.draws",
+                rows
+            )
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set
+
+from utils.ids import new_id
+from utils.json_codec import encode_message
+
+logger = logging.getLogger(__name__)
+
+# Segundos máximos para entregar un frame a un espectador antes de soltarlo
+SPECTATOR_SEND_TIMEOUT = 2.0
+
+
+class Spectator:
+    """Conexión de solo lectura que sigue una partida."""
+
+    __slots__ = ("id", "websocket", "game_id", "shard", "version", "task")
+
+    def __init__(self, websocket, game_id: str, shard: int):
+        self.id = new_id()
+        self.websocket = websocket
+        self.game_id = game_id
+        self.shard = shard
+        self.version = 0  # Última versión del canal que recibió
+        self.task: Optional[asyncio.Task] = None  # Envío en curso, si hay
+
+
+class _Channel:
+    """Último frame publicado de una partida y sus espectadores por shard."""
+
+    __slots__ = ("game_id", "frame", "version", "members", "closed")
+
+    def __init__(self, game_id: str, shards: int):
+        self.game_id = game_id
+        self.frame: Optional[str] = None
+        self.version = 0
+        self.members: List[Set[Spectator]] = [set() for _ in range(shards)]
+        self.closed = False  # La partida terminó: tras el último frame se cierra el socket
+
+
+class SpectatorHub:
+    """Fan-out de solo lectura para espectadores de partidas.
+
+    Publicar no recorre a los espectadores: solo guarda el frame (serializado
+    una vez) como la versión más reciente del canal y marca el canal en los
+    shards que tienen espectadores. La tarea de cada shard no espera a ningún
+    socket: a cada espectador sin envío en curso le lanza uno con la última
+    versión; quien está ocupado la toma al terminar su envío actual y se
+    salta las intermedias. Así un socket lento solo se atrasa a sí mismo y el
+    costo para el movimiento de los jugadores es O(shards), no O(espectadores).
+    """
+
+    def __init__(self, shards: int = 4):
+        self._shards = shards
+        self._channels: Dict[str, _Channel] = {}
+        # Por shard: canales pendientes y aviso a su escritor; se crean en
+        # start(), ya dentro del loop (en 3.9 un Event se ata al loop vigente)
+        self._dirty: List[Dict[_Channel, None]] = []
+        self._ready: List[asyncio.Event] = []
+        self._writers: List[asyncio.Task] = []
+        self._next_shard = 0
+        self.count = 0
+        self.frames_sent = 0
+
+    def start(self):
+        self._dirty = [{} for _ in range(self._shards)]
+        self._ready = [asyncio.Event() for _ in range(self._shards)]
+        self._writers = [asyncio.create_task(self._writer(i)) for i in range(self._shards)]
+
+    async def close(self):
+        for task in self._writers:
+            task.cancel()
+        self._writers = []
+        for channel in self._channels.values():
+            for members in channel.members:
+                for spectator in members:
+                    if spectator.task is not None:
+                        spectator.task.cancel()
+
+    def watching(self, game_id: str) -> bool:
+        """Indica si la partida tiene espectadores (para no armar snapshots en vano)."""
+        return game_id in self._channels
+
+    def spectators_of(self, game_id: str) -> int:
+        channel = self._channels.get(game_id)
+        return sum(len(members) for members in channel.members) if channel else 0
+
+    def subscribe(self, websocket, game_id: str, snapshot: dict) -> Spectator:
+        """Suscribe un socket a la partida y le envía `snapshot` (el estado actual)."""
+        shard = self._next_shard
+        self._next_shard = (shard + 1) % self._shards
+        spectator = Spectator(websocket, game_id, shard)
+        frame = encode_message(snapshot)
+        channel = self._channels.get(game_id)
+        if channel is None:
+            channel = self._channels[game_id] = _Channel(game_id, self._shards)
+            channel.frame = frame
+            channel.version = 1
+        channel.members[shard].add(spectator)
+        self.count += 1
+        # El snapshot ya incluye todo lo publicado hasta ahora en el canal
+        spectator.version = channel.version
+        spectator.task = asyncio.create_task(self._deliver(spectator, channel, frame))
+        return spectator
+
+    def unsubscribe(self, spectator: Spectator):
+        channel = self._channels.get(spectator.game_id)
+        if channel is None or spectator not in channel.members[spectator.shard]:
+            return
+        channel.members[spectator.shard].discard(spectator)
+        self.count -= 1
+        if not any(channel.members):
+            del self._channels[spectator.game_id]
+
+    def publish(self, game_id: str, message: dict):
+        """Publica un evento de la partida; sin espectadores no cuesta nada."""
+        channel = self._channels.get(game_id)
+        if channel is None:
+            return
+        channel.frame = encode_message(message)
+        channel.version += 1
+        for shard, members in enumerate(channel.members):
+            if members:
+                self._mark(channel, shard)
+
+    def close_game(self, game_id: str, message: dict):
+        """Último frame de una partida eliminada; luego se cierran los sockets."""
+        self.publish(game_id, message)
+        channel = self._channels.pop(game_id, None)
+        if channel:
+            channel.closed = True
+            self.count -= sum(len(members) for members in channel.members)
+
+    def _mark(self, channel: _Channel, shard: int):
+        self._dirty[shard][channel] = None
+        self._ready[shard].set()
+
+    async def _writer(self, shard: int):
+        dirty = self._dirty[shard]
+        ready = self._ready[shard]
+        while True:
+            await ready.wait()
+            ready.clear()
+            while dirty:
+                channel = next(iter(dirty))
+                del dirty[channel]
+                self._flush(channel, shard)
+
+    def _flush(self, channel: _Channel, shard: int):
+        for spectator in channel.members[shard]:
+            # Con un envío en curso, la nueva versión se toma al terminarlo
+            if spectator.task is None and spectator.version < channel.version:
+                spectator.task = asyncio.create_task(self._deliver(spectator, channel))
+
+    async def _deliver(self, spectator: Spectator, channel: _Channel,
+                       frame: Optional[str] = None):
+        """Envía a un espectador la última versión del canal hasta ponerlo al día."""
+        try:
+            while True:
+                if frame is None:
+                    if spectator.version >= channel.version:
+                        break
+                    spectator.version = channel.version
+                    frame = channel.frame
+                await asyncio.wait_for(spectator.websocket.send_text(frame),
+                                       SPECTATOR_SEND_TIMEOUT)
+                self.frames_sent += 1
+                frame = None
+        except Exception:
+            logger.info(f"Espectador {spectator.id} no recibe; se elimina")
+            self.unsubscribe(spectator)
+            await self._close_socket(spectator)
+            return
+        finally:
+            spectator.task = None
+        if channel.closed:
+            await self._close_socket(spectator)
+
+    @staticmethod
+    async def _close_socket(spectator: Spectator):
+        try:
+            await asyncio.wait_for(spectator.websocket.close(), SPECTATOR_SEND_TIMEOUT)
+        except Exception:
+            pass
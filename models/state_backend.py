@@ -0,0 +1,425 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional
+
+from models.game import Game
+
+logger = logging.getLogger(__name__)
+
+# Callback para entregar un frame a un jugador conectado a este worker:
+# (player_id, game_id, frame, delta_frame)
+DeliverCallback = Callable[[str, Optional[str], str, Optional[str]], Awaitable[None]]
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class StateBackend(ABC):
+    """Estado compartido entre workers: jugadores, partidas, espera y mensajes.
+
+    El GameManager guarda las conexiones (websockets) localmente y usa el
+    backend para todo lo que otro worker necesita ver.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None):
+        self.worker_id = worker_id or default_worker_id()
+        self.on_deliver: Optional[DeliverCallback] = None
+
+    async def start(self):
+        """Inicializa recursos (conexiones, tareas de sondeo)."""
+
+    async def close(self):
+        """Libera recursos."""
+
+    @abstractmethod
+    async def save_player(self, player_id: str, name: str,
+                          game_id: Optional[str], connected: bool,
+                          stats_key: Optional[str] = None):
+        """Crea o actualiza el registro de un jugador conectado a este worker."""
+
+    @abstractmethod
+    async def set_player_game(self, player_id: str, game_id: Optional[str]):
+        """Asigna la partida de un jugador, sin importar a qué worker esté conectado."""
+
+    @abstractmethod
+    async def get_player(self, player_id: str) -> Optional[dict]:
+        """Retorna {"id", "name", "game_id", "connected", "stats_key"} o None."""
+
+    @abstractmethod
+    async def delete_player(self, player_id: str):
+        """Elimina el registro de un jugador."""
+
+    @abstractmethod
+    async def claim_waiting(self, player_id: str, bucket: str = "") -> Optional[str]:
+        """Toma atómicamente al rival en espera más antiguo del mismo bucket.
+
+        Si no hay ninguno disponible, deja a `player_id` en espera en `bucket`
+        y retorna None.
+        """
+
+    @abstractmethod
+    async def remove_waiting(self, player_id: str) -> bool:
+        """Saca a un jugador de la espera; False si ya no estaba (otro worker lo tomó)."""
+
+    @abstractmethod
+    async def load_game(self, game_id: str) -> Optional[Game]:
+        """Retorna el estado más reciente de la partida."""
+
+    @abstractmethod
+    async def save_game(self, game: Game, expected_seq: Optional[int] = None) -> bool:
+        """Guarda la partida.
+
+        Con `expected_seq` la escritura solo se aplica si nadie más modificó
+        la partida desde que se cargó; retorna False si hubo conflicto.
+        """
+
+    @abstractmethod
+    async def delete_game(self, game_id: str):
+        """Elimina una partida."""
+
+    @abstractmethod
+    async def publish(self, player_id: str, game_id: Optional[str],
+                      frame: str, delta_frame: Optional[str] = None):
+        """Entrega un frame a un jugador conectado a otro worker."""
+
+
+class InMemoryBackend(StateBackend):
+    """Backend de un solo proceso: todo vive en diccionarios del worker."""
+
+    def __init__(self, worker_id: Optional[str] = None):
+        super().__init__(worker_id)
+        self._players: Dict[str, dict] = {}
+        self._games: Dict[str, Game] = {}
+        # Espera compartida por bucket: bucket -> jugadores en orden de llegada
+        self._waiting: Dict[str, "OrderedDict[str, None]"] = {}
+        self._waiting_bucket: Dict[str, str] = {}
+
+    async def save_player(self, player_id: str, name: str,
+                          game_id: Optional[str], connected: bool,
+                          stats_key: Optional[str] = None):
+        self._players[player_id] = {
+            "id": player_id, "name": name, "game_id": game_id, "connected": connected,
+            "stats_key": stats_key
+        }
+
+    async def set_player_game(self, player_id: str, game_id: Optional[str]):
+        record = self._players.get(player_id)
+        if record:
+            record["game_id"] = game_id
+
+    async def get_player(self, player_id: str) -> Optional[dict]:
+        return self._players.get(player_id)
+
+    async def delete_player(self, player_id: str):
+        self._players.pop(player_id, None)
+        await self.remove_waiting(player_id)
+
+    async def claim_waiting(self, player_id: str, bucket: str = "") -> Optional[str]:
+        await self.remove_waiting(player_id)
+        queue = self._waiting.get(bucket)
+        while queue:
+            other_id, _ = queue.popitem(last=False)
+            del self._waiting_bucket[other_id]
+            other = self._players.get(other_id)
+            if other and other["connected"]:
+                if not queue:
+                    del self._waiting[bucket]
+                return other_id
+        self._waiting.setdefault(bucket, OrderedDict())[player_id] = None
+        self._waiting_bucket[player_id] = bucket
+        return None
+
+    async def remove_waiting(self, player_id: str) -> bool:
+        bucket = self._waiting_bucket.pop(player_id, None)
+        if bucket is None:
+            return False
+        queue = self._waiting[bucket]
+        del queue[player_id]
+        if not queue:
+            del self._waiting[bucket]
+        return True
+
+    async def load_game(self, game_id: str) -> Optional[Game]:
+        return self._games.get(game_id)
+
+    async def save_game(self, game: Game, expected_seq: Optional[int] = None) -> bool:
+        # Los objetos se comparten con el GameManager: no hay copia que sincronizar
+        self._games[game.id] = game
+        return True
+
+    async def delete_game(self, game_id: str):
+        self._games.pop(game_id, None)
+
+    async def publish(self, player_id: str, game_id: Optional[str],
+                      frame: str, delta_frame: Optional[str] = None):
+        # En un solo proceso no existen jugadores remotos
+        return None
+
+
+class SQLiteBackend(StateBackend):
+    """Backend compartido entre procesos sobre un archivo SQLite en modo WAL.
+
+    Cada worker sondea la tabla `events` para recibir los frames dirigidos a
+    sus jugadores. Las consultas se ejecutan en un hilo dedicado para no
+    bloquear el event loop.
+    """
+
+    def __init__(self, path: str, worker_id: Optional[str] = None,
+                 poll_interval: float = 0.02, worker_ttl: float = 5.0):
+        super().__init__(worker_id)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.worker_ttl = worker_ttl  # Workers sin heartbeat se consideran caídos
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-backend")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._cursor_id = 0
+        self._poll_task: Optional[asyncio.Task] = None
+        self._last_heartbeat = 0.0
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS workers (
+                id TEXT PRIMARY KEY, last_seen REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS players (
+                id TEXT PRIMARY KEY, name TEXT NOT NULL, game_id TEXT,
+                worker_id TEXT NOT NULL, connected INTEGER NOT NULL, stats_key TEXT);
+            CREATE TABLE IF NOT EXISTS games (
+                id TEXT PRIMARY KEY, seq INTEGER NOT NULL, state TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS waiting (
+                rowid INTEGER PRIMARY KEY AUTOINCREMENT, player_id TEXT UNIQUE NOT NULL,
+                bucket TEXT NOT NULL DEFAULT '');
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, worker_id TEXT NOT NULL,
+                player_id TEXT NOT NULL, game_id TEXT, frame TEXT NOT NULL,
+                delta_frame TEXT);
+            CREATE INDEX IF NOT EXISTS events_worker ON events (worker_id, id);
+        """)
+        # Archivos creados antes de la espera por bucket: la espera es transitoria
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(waiting)")]
+        if "bucket" not in columns:
+            conn.execute("DROP TABLE waiting")
+            conn.execute(
+                "CREATE TABLE waiting (rowid INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "player_id TEXT UNIQUE NOT NULL, bucket TEXT NOT NULL DEFAULT '')"
+            )
+        conn.execute("CREATE INDEX IF NOT EXISTS waiting_bucket ON waiting (bucket, rowid)")
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(players)")]
+        if "stats_key" not in columns:
+            conn.execute("ALTER TABLE players ADD COLUMN stats_key TEXT")
+        conn.execute(
+            "INSERT OR REPLACE INTO workers (id, last_seen) VALUES (?, ?)",
+            (self.worker_id, time.time())
+        )
+        # Los eventos anteriores al arranque de este worker no le pertenecen
+        row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()
+        self._cursor_id = row[0]
+        self._conn = conn
+
+    async def start(self):
+        await self._run(self._connect)
+        self._poll_task = asyncio.create_task(self._poll_loop())
+        logger.info(f"Backend SQLite {self.path} iniciado (worker {self.worker_id})")
+
+    async def close(self):
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+        if self._conn is not None:
+            await self._run(self._close_connection)
+        self._executor.shutdown(wait=False)
+
+    def _close_connection(self):
+        self._conn.execute("DELETE FROM workers WHERE id = ?", (self.worker_id,))
+        self._conn.close()
+        self._conn = None
+
+    # ----- Jugadores -----
+
+    async def save_player(self, player_id: str, name: str,
+                          game_id: Optional[str], connected: bool,
+                          stats_key: Optional[str] = None):
+        await self._run(
+            self._execute,
+            "INSERT OR REPLACE INTO players (id, name, game_id, worker_id, connected, "
+            "stats_key) VALUES (?, ?, ?, ?, ?, ?)",
+            (player_id, name, game_id, self.worker_id, int(connected), stats_key)
+        )
+
+    async def set_player_game(self, player_id: str, game_id: Optional[str]):
+        await self._run(
+            self._execute, "UPDATE players SET game_id = ? WHERE id = ?", (game_id, player_id)
+        )
+
+    async def get_player(self, player_id: str) -> Optional[dict]:
+        row = await self._run(
+            self._fetchone,
+            "SELECT id, name, game_id, connected, stats_key FROM players WHERE id = ?",
+            (player_id,)
+        )
+        if row is None:
+            return None
+        return {"id": row[0], "name": row[1], "game_id": row[2], "connected": bool(row[3]),
+                "stats_key": row[4]}
+
+    async def delete_player(self, player_id: str):
+        await self._run(self._delete_player, player_id)
+
+    def _delete_player(self, player_id: str):
+        with self._transaction():
+            self._conn.execute("DELETE FROM players WHERE id = ?", (player_id,))
+            self._conn.execute("DELETE FROM waiting WHERE player_id = ?", (player_id,))
+
+    # ----- Emparejamiento -----
+
+    async def claim_waiting(self, player_id: str, bucket: str = "") -> Optional[str]:
+        return await self._run(self._claim_waiting, player_id, bucket)
+
+    def _claim_waiting(self, player_id: str, bucket: str) -> Optional[str]:
+        alive_since = time.time() - self.worker_ttl
+        with self._transaction():
+            while True:
+                row = self._conn.execute(
+                    "SELECT w.rowid, w.player_id, p.connected, k.last_seen "
+                    "FROM waiting w "
+                    "LEFT JOIN players p ON p.id = w.player_id "
+                    "LEFT JOIN workers k ON k.id = p.worker_id "
+                    "WHERE w.bucket = ? AND w.player_id != ? ORDER BY w.rowid LIMIT 1",
+                    (bucket, player_id)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO waiting (player_id, bucket) VALUES (?, ?)",
+                        (player_id, bucket)
+                    )
+                    return None
+                self._conn.execute("DELETE FROM waiting WHERE rowid = ?", (row[0],))
+                # Descarta esperas de jugadores desconectados o de workers caídos
+                if row[2] and row[3] is not None and row[3] >= alive_since:
+                    self._conn.execute(
+                        "DELETE FROM waiting WHERE player_id = ?", (player_id,)
+                    )
+                    return row[1]
+
+    async def remove_waiting(self, player_id: str) -> bool:
+        removed = await self._run(
+            self._execute, "DELETE FROM waiting WHERE player_id = ?", (player_id,)
+        )
+        return removed == 1
+
+    # ----- Partidas -----
+
+    async def load_game(self, game_id: str) -> Optional[Game]:
+        row = await self._run(
+            self._fetchone, "SELECT state FROM games WHERE id = ?", (game_id,)
+        )
+        return Game.from_dict(json.loads(row[0])) if row else None
+
+    async def save_game(self, game: Game, expected_seq: Optional[int] = None) -> bool:
+        state = json.dumps(game.to_dict(), separators=(",", ":"))
+        if expected_seq is None:
+            await self._run(
+                self._execute,
+                "INSERT OR REPLACE INTO games (id, seq, state) VALUES (?, ?, ?)",
+                (game.id, game.seq, state)
+            )
+            return True
+        updated = await self._run(
+            self._execute,
+            "UPDATE games SET seq = ?, state = ? WHERE id = ? AND seq = ?",
+            (game.seq, state, game.id, expected_seq)
+        )
+        return updated == 1
+
+    async def delete_game(self, game_id: str):
+        await self._run(self._execute, "DELETE FROM games WHERE id = ?", (game_id,))
+
+    # ----- Mensajes entre workers -----
+
+    async def publish(self, player_id: str, game_id: Optional[str],
+                      frame: str, delta_frame: Optional[str] = None):
+        await self._run(
+            self._execute,
+            "INSERT INTO events (worker_id, player_id, game_id, frame, delta_frame) "
+            "SELECT worker_id, ?, ?, ?, ? FROM players WHERE id = ? AND connected = 1",
+            (player_id, game_id, frame, delta_frame, player_id)
+        )
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                events = await self._run(self._fetch_events)
+                for _, player_id, game_id, frame, delta_frame in events:
+                    if self.on_deliver is not None:
+                        await self.on_deliver(player_id, game_id, frame, delta_frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error sondeando eventos del backend")
+            await asyncio.sleep(self.poll_interval)
+
+    def _fetch_events(self):
+        now = time.time()
+        if now - self._last_heartbeat >= 1.0:
+            self._last_heartbeat = now
+            self._conn.execute(
+                "INSERT OR REPLACE INTO workers (id, last_seen) VALUES (?, ?)",
+                (self.worker_id, now)
+            )
+        events = self._conn.execute(
+            "SELECT id, player_id, game_id, frame, delta_frame FROM events "
+            "WHERE worker_id = ? AND id > ? ORDER BY id",
+            (self.worker_id, self._cursor_id)
+        ).fetchall()
+        if events:
+            self._cursor_id = events[-1][0]
+            self._conn.execute(
+                "DELETE FROM events WHERE worker_id = ? AND id <= ?",
+                (self.worker_id, self._cursor_id)
+            )
+        return events
+
+    # ----- Utilidades (se ejecutan en el hilo del backend) -----
+
+    def _execute(self, sql: str, params: tuple) -> int:
+        return self._conn.execute(sql, params).rowcount
+
+    def _fetchone(self, sql: str, params: tuple):
+        return self._conn.execute(sql, params).fetchone()
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn)
+
+
+class _ImmediateTransaction:
+    """BEGIN IMMEDIATE ... COMMIT: serializa las escrituras entre procesos."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self._conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
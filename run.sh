@@ -20,6 +20,8 @@ fi
 
 # 3. Servidor
 cd ..
+echo "   Generando tabla de posiciones resueltas para la IA..."
+python tools/build_solved_table.py
 echo "3. Iniciando servidor FastAPI..."
 echo "   URL: http://localhost:8000"
 echo "   WebSocket: ws://localhost:8000/ws"
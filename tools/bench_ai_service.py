@@ -0,0 +1,106 @@
+"""Lag del event loop con muchas partidas contra la IA en tableros grandes.
+
+Juega N partidas single-player simultáneas (el humano mueve al azar) usando
+la API del GameManager, mientras una sonda mide cuánto se atrasa el loop
+respecto a un sleep de 5 ms. Con el pool de procesos el lag debe quedar
+plano; con `--workers 0` (búsquedas en el loop) crece con cada búsqueda.
+Al final repite una misma posición desde muchos clientes a la vez para
+mostrar la deduplicación.
+
+Ejemplo:
+    python tools/bench_ai_service.py --games 32 --moves 10 --workers 2
+    python tools/bench_ai_service.py --games 32 --moves 10 --workers 0
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.service import DEFAULT_WORKERS  # noqa: E402
+from models.game_manager import GameManager  # noqa: E402
+
+PROBE_INTERVAL = 0.005
+
+
+async def _probe(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def _play(manager: GameManager, moves: int, size: int, win_length: int,
+                difficulty: str, rng: random.Random, latencies: list):
+    state = await manager.create_single_player_game(difficulty, size, win_length)
+    game_id = state["gameId"]
+    for _ in range(moves):
+        free = [r * size + c for r, row in enumerate(state["board"])
+                for c, cell in enumerate(row) if cell == "-"]
+        start = time.perf_counter()
+        state = await manager.handle_single_player_move(game_id, rng.choice(free))
+        latencies.append(time.perf_counter() - start)
+        if state["winner"] or state["draw"]:
+            state = await manager.reset_single_player_game(game_id)
+
+
+def _percentile(samples: list, fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+
+async def run(args):
+    manager = GameManager(heartbeat_interval=0, ai_workers=args.workers,
+                          ai_max_concurrent=args.max_concurrent, ai_time_budget=args.budget)
+    await manager.start()
+    rng = random.Random(args.seed)
+    lags, latencies = [], []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _play(manager, args.moves, args.size, args.win_length, "hard", rng, latencies)
+        for _ in range(args.games)
+    ))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+
+    workers = DEFAULT_WORKERS if args.workers is None else args.workers
+    mode = "en el loop" if workers == 0 else f"pool de {workers} procesos"
+    print(f"{args.games} partidas {args.size}x{args.size} ({mode}), "
+          f"{len(latencies)} jugadas de la IA en {elapsed:.1f}s")
+    print(f"lag del loop: p50 {_percentile(lags, 0.5) * 1000:.1f} ms, "
+          f"p99 {_percentile(lags, 0.99) * 1000:.1f} ms, max {max(lags) * 1000:.1f} ms")
+    print(f"respuesta por jugada: p50 {_percentile(latencies, 0.5) * 1000:.0f} ms, "
+          f"p99 {_percentile(latencies, 0.99) * 1000:.0f} ms")
+
+    # Misma posición pedida por muchos clientes a la vez: una sola búsqueda
+    before = manager._ai.searches
+    state = await manager.create_single_player_game("hard", args.size, args.win_length)
+    game = manager._single_player_games[state["gameId"]]
+    game.make_move(args.size * args.size // 2)
+    await asyncio.gather(*(manager._ai.choose_move(game, "hard") for _ in range(args.games)))
+    print(f"{args.games} consultas idénticas -> {manager._ai.searches - before} búsqueda(s)")
+    await manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=32)
+    parser.add_argument("--moves", type=int, default=10, help="Jugadas por partida")
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--win-length", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos del pool (0 = búsquedas en el loop)")
+    parser.add_argument("--max-concurrent", type=int, default=4)
+    parser.add_argument("--budget", type=float, default=0.1, help="Segundos por búsqueda")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Costo por movimiento de Game en tableros N×N (k en línea).
+
+Compara la detección incremental (solo las líneas de la última ficha) con
+volver a recorrer todo el tablero en cada jugada, como hacía
+`board_utils.check_winner`. El costo incremental debe quedar plano al
+crecer N; el del recorrido completo crece con N².
+
+Ejemplo:
+    python tools/bench_board.py --sizes 3 15 19 50 100 --moves 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.game import Game  # noqa: E402
+from utils.board_utils import check_winner  # noqa: E402
+
+# Secuencias aleatorias precalculadas por tamaño (fuera de la medición)
+SEQUENCES = 8
+
+
+def _sequences(size: int, rng: random.Random) -> list:
+    sequences = []
+    for _ in range(SEQUENCES):
+        order = list(range(size * size))
+        rng.shuffle(order)
+        sequences.append(order)
+    return sequences
+
+
+def bench_incremental(size: int, win_length: int, moves: int, rng: random.Random) -> float:
+    """ns por make_move (incluye la detección de victoria)."""
+    sequences = _sequences(size, rng)
+    game = Game(size=size, win_length=win_length)
+    done = 0
+    elapsed = 0.0
+    i = 0
+    while done < moves:
+        sequence = sequences[i % SEQUENCES]
+        i += 1
+        start = time.perf_counter()
+        for pos in sequence:
+            game.make_move(pos)
+            if game.finished:
+                break
+        elapsed += time.perf_counter() - start
+        done += game.moves_count
+        game.reset()
+    return elapsed / done * 1e9
+
+
+def bench_rescan(size: int, win_length: int, moves: int, rng: random.Random) -> float:
+    """ns por jugada si tras cada una se recorre todo el tablero."""
+    sequences = _sequences(size, rng)
+    board = [["-"] * size for _ in range(size)]
+    done = 0
+    elapsed = 0.0
+    i = 0
+    symbols = "XO"
+    while done < moves:
+        sequence = sequences[i % SEQUENCES]
+        i += 1
+        start = time.perf_counter()
+        for n, pos in enumerate(sequence):
+            board[pos // size][pos % size] = symbols[n & 1]
+            done += 1
+            if check_winner(board, win_length) or done >= moves:
+                break
+        elapsed += time.perf_counter() - start
+        for row in board:
+            row[:] = ["-"] * size
+    return elapsed / done * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 15, 19, 50, 100])
+    parser.add_argument("--win-length", type=int, default=5,
+                        help="Fichas en línea para ganar (3 en el tablero de 3x3)")
+    parser.add_argument("--moves", type=int, default=200000)
+    parser.add_argument("--rescan-moves", type=int, default=2000,
+                        help="Jugadas a medir con recorrido completo (es lento)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'tablero':<12} {'k':>3} {'incremental':>16} {'recorrido completo':>22}")
+    for size in args.sizes:
+        win_length = min(args.win_length, size)
+        incremental = bench_incremental(size, win_length, args.moves, rng)
+        rescan = bench_rescan(size, win_length, args.rescan_moves, rng)
+        print(f"{f'{size}x{size}':<12} {win_length:>3} {incremental:>13.0f} ns "
+              f"{rescan:>19.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Microbenchmarks del camino caliente: Game.make_move, Game.check_winner y
+GameManager.handle_message (con sockets falsos, sin red).
+
+Ejemplo:
+    python tools/bench_game.py --iterations 200000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.game import Game  # noqa: E402
+from models.game_manager import DEFAULT_RATE_LIMITS, GameManager  # noqa: E402
+
+# X gana en la quinta jugada; se repite con reset() entre rondas
+SCRIPT = (0, 3, 1, 4, 2)
+
+
+class NullWebSocket:
+    """Socket que descarta los frames: solo se mide el trabajo del servidor."""
+
+    async def send_text(self, data: str):
+        pass
+
+    async def close(self):
+        pass
+
+
+def _report(name: str, iterations: int, elapsed: float):
+    print(f"{name:<44} {elapsed / iterations * 1e9:>10.0f} ns/op  "
+          f"({iterations / elapsed:,.0f} op/s)")
+
+
+def bench_make_move(iterations: int):
+    game = Game()
+    start = time.perf_counter()
+    done = 0
+    while done < iterations:
+        for pos in SCRIPT:
+            game.make_move(pos)
+        game.reset()
+        done += len(SCRIPT)
+    _report("Game.make_move", done, time.perf_counter() - start)
+
+
+def bench_check_winner(iterations: int):
+    game = Game()
+    for pos in (0, 3, 1, 4):
+        game.make_move(pos)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        game.check_winner()
+    _report("Game.check_winner", iterations, time.perf_counter() - start)
+
+
+async def _setup_match(manager: GameManager):
+    first = await manager.connect_player(NullWebSocket())
+    second = await manager.connect_player(NullWebSocket())
+    await manager._run_matchmaking()
+    game = manager.games[first.game_id]
+    players = {game.player_x: first, game.player_o: second}
+    return game, players[game.player_x], players[game.player_o]
+
+
+async def bench_handle_message(iterations: int):
+    # Sin límite de frames para medir el procesamiento; el límite se mide aparte
+    unlimited = {mtype: (1e12, 1e12) for mtype in DEFAULT_RATE_LIMITS}
+    manager = GameManager(rate_limits=unlimited)
+    await manager.start()
+    try:
+        game, player_x, player_o = await _setup_match(manager)
+        move_messages = [{"type": "move", "position": pos} for pos in SCRIPT]
+        reset_message = {"type": "game_reset"}
+
+        done = 0
+        start = time.perf_counter()
+        while done < iterations:
+            for message in move_messages:
+                player = player_x if game.turn == "X" else player_o
+                await manager.handle_message(player, message)
+                game = manager.games[game.id]
+            await manager.handle_message(player_x, reset_message)
+            game = manager.games[game.id]
+            done += len(move_messages) + 1
+            # Dejar que las tareas escritoras vacíen las colas
+            await asyncio.sleep(0)
+        _report("GameManager.handle_message", done, time.perf_counter() - start)
+
+        chat_message = {"type": "chat_message", "message": "hola"}
+        chat_iterations = iterations // 4
+        start = time.perf_counter()
+        for i in range(chat_iterations):
+            await manager.handle_message(player_x, chat_message)
+            if i % 32 == 0:
+                await asyncio.sleep(0)
+        _report("GameManager.handle_message chat", chat_iterations, time.perf_counter() - start)
+
+        # Frames inválidos: deberían rechazarse antes de cualquier trabajo caro
+        for name, message in (("invalid type", {"type": "nope"}),
+                              ("invalid position", {"type": "move", "position": "x"})):
+            start = time.perf_counter()
+            for i in range(chat_iterations):
+                await manager.handle_message(player_x, message)
+                if i % 32 == 0:
+                    await asyncio.sleep(0)
+            _report(f"GameManager.handle_message {name}", chat_iterations,
+                    time.perf_counter() - start)
+    finally:
+        await manager.close()
+
+    # Frames rechazados por el límite (flood de un solo cliente)
+    manager = GameManager()
+    await manager.start()
+    try:
+        _, player_x, _ = await _setup_match(manager)
+        chat_message = {"type": "chat_message", "message": "spam"}
+        start = time.perf_counter()
+        for i in range(iterations):
+            await manager.handle_message(player_x, chat_message)
+            if i % 32 == 0:
+                await asyncio.sleep(0)
+        _report("GameManager.handle_message throttled", iterations, time.perf_counter() - start)
+    finally:
+        await manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+    bench_make_move(args.iterations)
+    bench_check_winner(args.iterations)
+    asyncio.run(bench_handle_message(args.iterations // 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Costo de actualizar y leer el ranking con muchos jugadores.
+
+Carga N jugadores, registra resultados al azar y mide: actualización
+incremental (bisect) vs reordenar todo por cada resultado, lectura del
+top-K desde memoria y la escritura por lotes a SQLite.
+
+Ejemplo:
+    python tools/bench_leaderboard.py --players 100000 --results 50000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.player_stats import PlayerStats, StatsStore  # noqa: E402
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    players = [{"id": f"id-{i}", "name": f"jugador-{i}"} for i in range(args.players)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = StatsStore(os.path.join(directory, "stats.db"), flush_interval=3600)
+        await store.start()
+        for i in range(0, len(players) - 1, 2):
+            store.record_draw(players[i], players[i + 1])
+        await store.flush()
+
+        start = time.perf_counter()
+        for _ in range(args.results):
+            winner, loser = rng.sample(players, 2)
+            store.record_win(winner, loser)
+        elapsed = time.perf_counter() - start
+        print(f"resultado incremental: {elapsed / args.results * 1e6:8.2f} us "
+              f"({args.players:,} jugadores)")
+
+        start = time.perf_counter()
+        for _ in range(args.reads):
+            store.top(args.top)
+        elapsed = time.perf_counter() - start
+        print(f"lectura del top {args.top}:     {elapsed / args.reads * 1e6:8.2f} us")
+
+        start = time.perf_counter()
+        pending = len(store._pending)
+        await store.flush()
+        print(f"escritura por lotes:   {(time.perf_counter() - start) * 1000:8.1f} ms "
+              f"({pending:,} jugadores en una transacción)")
+        await store.close()
+
+    # Referencia: reordenar todos los jugadores tras cada resultado
+    stats = {p["id"]: PlayerStats(p["id"], p["name"]) for p in players}
+    rounds = max(1, min(args.results, 200))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        winner, loser = rng.sample(players, 2)
+        stats[winner["id"]].wins += 1
+        stats[loser["id"]].losses += 1
+        sorted(stats.values(), key=lambda s: s.key)[:args.top]
+    elapsed = time.perf_counter() - start
+    print(f"reordenar todo:        {elapsed / rounds * 1e6:8.2f} us por resultado")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=100000)
+    parser.add_argument("--results", type=int, default=50000)
+    parser.add_argument("--reads", type=int, default=10000)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
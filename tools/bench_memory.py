@@ -0,0 +1,102 @@
+"""Memoria por jugador y por partida (tracemalloc), con los mismos objetos que
+crea el servidor: PlayerConnection registrados en el GameManager y partidas
+con su entrada en la caché, y el total de un jugador conectado (con sus
+primeros frames en vuelo y ya inactivo).
+
+Ejemplo:
+    python tools/bench_memory.py --players 100000
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.game import Game  # noqa: E402
+from models.game_manager import GameManager  # noqa: E402
+from models.player import PlayerConnection  # noqa: E402
+
+
+class NullWebSocket:
+    __slots__ = ()
+
+    async def send_text(self, data: str):
+        pass
+
+    async def close(self):
+        pass
+
+
+def _measure(build) -> int:
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    del keep
+    return used
+
+
+async def run(players: int):
+    # Con heartbeat: cada conexión recibe su primer ping (sin start() no hay latidos)
+    manager = GameManager()
+    websocket = NullWebSocket()
+    tracemalloc.start()
+
+    def build_players():
+        for _ in range(players):
+            player = PlayerConnection(websocket)
+            manager._players[player.id] = player
+        return None
+
+    used = _measure(build_players)
+    print(f"Jugadores: {players:,}  {used / players:,.0f} B por jugador "
+          f"(PlayerConnection + entrada en el dict)")
+
+    ids = list(manager._players)
+
+    def build_games():
+        for i in range(0, len(ids) - 1, 2):
+            game = Game(player_x=ids[i], player_o=ids[i + 1])
+            manager.games[game.id] = game
+        return None
+
+    used = _measure(build_games)
+    games = len(ids) // 2
+    print(f"Partidas: {games:,}  {used / games:,.0f} B por partida (Game + entrada en el dict)")
+
+    # Jugadores conectados como en el servidor: reciben "registered" y el
+    # primer ping apenas se registran, y quedan en la cola de emparejamiento
+    sample = min(players, 10000)
+    connected = []
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(sample):
+        connected.append(await manager.connect_player(websocket))
+    gc.collect()
+    in_flight = tracemalloc.get_traced_memory()[0] - before
+    # Cada tarea escritora envía sus frames, termina y suelta la cola
+    for _ in range(3):
+        await asyncio.sleep(0)
+    gc.collect()
+    idle = tracemalloc.get_traced_memory()[0] - before
+    print(f"Jugador conectado (total, con registro en el backend y en la cola de "
+          f"emparejamiento): {in_flight / sample:,.0f} B con frames por enviar, "
+          f"{idle / sample:,.0f} B inactivo")
+    tracemalloc.stop()
+    for player in connected:
+        player.stop_writer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=100000)
+    args = parser.parse_args()
+    asyncio.run(run(args.players))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Resuelve todas las posiciones alcanzables de triqui y escribe la tabla binaria
+que el servidor mapea en memoria al arrancar (ver ai/solved_table.py).
+
+Ejemplo:
+    python tools/build_solved_table.py data/solved_table.bin
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.minimax import MiniMaxAI  # noqa: E402
+from ai.solved_table import (  # noqa: E402
+    DEFAULT_PATH, ENTRY_SIZE, HEADER, MAGIC, NO_MOVE, NUM_POSITIONS, board_index,
+)
+from models.game import FULL_BOARD, WINNING_BITS  # noqa: E402
+
+
+def build_table() -> bytearray:
+    ai = MiniMaxAI()
+    data = bytearray(HEADER.pack(MAGIC, NUM_POSITIONS))
+    data += bytes((NO_MOVE, 0)) * NUM_POSITIONS
+
+    # Recorrido de todas las posiciones alcanzables desde el tablero vacío
+    pending = [(0, 0)]
+    seen = set()
+    while pending:
+        x_bits, o_bits = pending.pop()
+        if (x_bits, o_bits) in seen:
+            continue
+        seen.add((x_bits, o_bits))
+        occupied = x_bits | o_bits
+        if occupied == FULL_BOARD or WINNING_BITS[x_bits] or WINNING_BITS[o_bits]:
+            continue
+
+        x_to_move = bin(x_bits).count("1") == bin(o_bits).count("1")
+        me, opp = (x_bits, o_bits) if x_to_move else (o_bits, x_bits)
+        move = ai.find_best_move(me, opp)
+        value = ai.evaluate(me, opp)
+        offset = HEADER.size + board_index(x_bits, o_bits) * ENTRY_SIZE
+        data[offset] = move
+        data[offset + 1] = value & 0xFF
+
+        for pos in range(9):
+            bit = 1 << pos
+            if not occupied & bit:
+                if x_to_move:
+                    pending.append((x_bits | bit, o_bits))
+                else:
+                    pending.append((x_bits, o_bits | bit))
+
+    print(f"Posiciones alcanzables: {len(seen)}")
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", nargs="?", default=DEFAULT_PATH,
+                        help=f"archivo de salida (por defecto {DEFAULT_PATH})")
+    args = parser.parse_args()
+    path = args.output
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    data = build_table()
+    # Escritura atómica para no dejar una tabla a medias si otro proceso la abre
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    print(f"Tabla escrita en {path} ({len(data)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Generador de carga para el endpoint /ws.
+
+Abre N clientes WebSocket simulados contra un servidor en marcha, los empareja
+de a dos, juega partidas aleatorias (con chat opcional) durante un tiempo fijo
+y reporta latencia movimiento -> broadcast (p50/p99), throughput y, si se pasa
+el pid del servidor, memoria por partida.
+
+Ejemplo:
+    python -m uvicorn main:app --port 8000 &
+    python tools/load_test.py --clients 2000 --duration 30 --server-pid $!
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List, Optional
+
+import websockets
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.moves = 0
+        self.games_finished = 0
+        self.chats = 0
+        self.errors = 0
+        self.connect_failures = 0
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+_LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
+
+
+def _is_over(cells: List[str]) -> bool:
+    """El snapshot llega antes que game_over: no mover en un tablero terminado."""
+    if all(cell in ("X", "O") for cell in cells):
+        return True
+    return any(cells[a] in ("X", "O") and cells[a] == cells[b] == cells[c] for a, b, c in _LINES)
+
+
+def _read_rss_kb(pid: Optional[int]) -> Optional[int]:
+    """RSS del proceso en KB (solo Linux, vía /proc)."""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+async def _client(url: str, symbol: str, stats: Stats, stop_at: float,
+                  chat_rate: float, think_time: float, rng: random.Random,
+                  ready: asyncio.Event, started: asyncio.Event):
+    async with websockets.connect(url, max_queue=None) as ws:
+        await ws.send(json.dumps({"type": "join", "playerName": f"load-{symbol}"}))
+        # El primero del par espera a estar en la cola antes de que entre el segundo,
+        # así juega con X
+        while True:
+            mtype = json.loads(await ws.recv())["type"]
+            if mtype == "ping":
+                await ws.send('{"type":"pong"}')
+            elif mtype == "waiting":
+                break
+        ready.set()
+
+        sent_at: Optional[float] = None
+        while time.monotonic() < stop_at:
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=max(0.01, stop_at - time.monotonic()))
+            except asyncio.TimeoutError:
+                break
+            msg = json.loads(raw)
+            mtype = msg.get("type")
+            if mtype == "ping":
+                await ws.send('{"type":"pong"}')
+                continue
+            if mtype == "error":
+                stats.errors += 1
+                sent_at = None
+                continue
+            if mtype == "game_over":
+                stats.games_finished += 1
+                if symbol == "X":
+                    await ws.send(json.dumps({"type": "game_reset"}))
+                continue
+            if mtype not in ("game_state", "game_reset"):
+                continue
+
+            started.set()
+            if sent_at is not None:
+                stats.latencies.append(time.monotonic() - sent_at)
+                sent_at = None
+            if msg.get("current_player") != symbol:
+                continue
+            cells = [cell for row in msg["board"] for cell in row]
+            if _is_over(cells):
+                continue
+            free = [i for i, cell in enumerate(cells) if cell not in ("X", "O")]
+            if think_time:
+                await asyncio.sleep(think_time)
+            if chat_rate and rng.random() < chat_rate:
+                await ws.send(json.dumps({"type": "chat_message", "message": "gg"}))
+                stats.chats += 1
+            sent_at = time.monotonic()
+            await ws.send(json.dumps({"type": "move", "position": rng.choice(free)}))
+            stats.moves += 1
+
+
+async def _pair(url: str, index: int, stats: Stats, stop_at: float, chat_rate: float,
+                think_time: float, seed: int, all_started: List[asyncio.Event]):
+    # Cada par usa su propia región para que el servidor los empareje entre sí
+    pair_url = f"{url}?region=load-{index}"
+    ready = asyncio.Event()
+    started = asyncio.Event()
+    all_started.append(started)
+    rng = random.Random(seed + index)
+    first = asyncio.create_task(
+        _client(pair_url, "X", stats, stop_at, chat_rate, think_time, rng, ready, started)
+    )
+    await ready.wait()
+    second = asyncio.create_task(
+        _client(pair_url, "O", stats, stop_at, chat_rate, think_time, rng,
+                asyncio.Event(), asyncio.Event())
+    )
+    results = await asyncio.gather(first, second, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            stats.connect_failures += 1
+
+
+async def run(args) -> Stats:
+    stats = Stats()
+    pairs = args.clients // 2
+    stop_at = time.monotonic() + args.ramp + args.duration
+    rss_before = _read_rss_kb(args.server_pid)
+    started: List[asyncio.Event] = []
+
+    tasks = []
+    for i in range(pairs):
+        tasks.append(asyncio.create_task(
+            _pair(args.url, i, stats, stop_at, args.chat_rate, args.think_time, args.seed, started)
+        ))
+        # Rampa de conexión para no saturar el accept del servidor
+        if args.ramp:
+            await asyncio.sleep(args.ramp / pairs)
+
+    # Memoria con todas las partidas activas
+    await asyncio.sleep(min(2.0, args.duration / 2))
+    active = sum(1 for event in started if event.is_set())
+    rss_peak = _read_rss_kb(args.server_pid)
+
+    begin = time.monotonic()
+    moves_before = stats.moves
+    await asyncio.gather(*tasks)
+    elapsed = max(time.monotonic() - begin, 1e-9)
+
+    samples = sorted(stats.latencies)
+    print(f"Clientes: {pairs * 2}  partidas activas: {active}")
+    print(f"Movimientos: {stats.moves}  ({(stats.moves - moves_before) / elapsed:.0f}/s)")
+    print(f"Partidas terminadas: {stats.games_finished}  chats: {stats.chats}  "
+          f"errores: {stats.errors}  fallos de conexión: {stats.connect_failures}")
+    print(f"Latencia movimiento->broadcast: p50 {_percentile(samples, 0.5) * 1000:.2f} ms  "
+          f"p99 {_percentile(samples, 0.99) * 1000:.2f} ms  "
+          f"max {(samples[-1] if samples else 0) * 1000:.2f} ms")
+    if rss_before is not None and rss_peak is not None and active:
+        print(f"Memoria del servidor: {rss_before} KB -> {rss_peak} KB  "
+              f"({(rss_peak - rss_before) / active:.1f} KB por partida)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws")
+    parser.add_argument("--clients", type=int, default=200, help="clientes simulados (pares)")
+    parser.add_argument("--duration", type=float, default=20.0, help="segundos de juego")
+    parser.add_argument("--ramp", type=float, default=2.0, help="segundos para abrir las conexiones")
+    parser.add_argument("--chat-rate", type=float, default=0.05,
+                        help="probabilidad de enviar un chat antes de cada movimiento")
+    parser.add_argument("--think-time", type=float, default=0.25,
+                        help="segundos antes de cada jugada (el servidor limita los frames por tipo)")
+    parser.add_argument("--server-pid", type=int, default=None,
+                        help="pid del servidor para medir su memoria (Linux)")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Simulador de partidas IA contra IA sin WebSockets (torneos y regresiones).
+
+Reparte lotes de partidas entre un ProcessPoolExecutor (un proceso por
+núcleo), escribe el resultado de cada lote en un archivo JSONL en cuanto
+termina y al final imprime victorias/empates por jugador y partidas por
+segundo. Solo hay unos pocos lotes en vuelo a la vez, así que la memoria no
+crece con el número de partidas.
+
+Jugadores: random, easy, medium y hard (las dificultades de la IA). En
+tableros distintos de 3x3 la IA usa la búsqueda de ai.grid_search con
+`--time-budget` segundos por jugada, como el AIService del servidor.
+
+Ejemplo:
+    python tools/selfplay.py --games 1000000 --players hard medium --alternate \\
+        --output selfplay.jsonl
+    python tools/selfplay.py --games 200 --size 9 --win-length 5 --players hard random \\
+        --batch-size 10 --time-budget 0.02
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.grid_search import search_move  # noqa: E402
+from ai.minimax import MiniMaxAI  # noqa: E402
+from ai.service import MEDIUM_RANDOM_RATE  # noqa: E402
+from ai.solved_table import DEFAULT_PATH, SolvedTable, load_solved_table  # noqa: E402
+from models.board import STONE_O, STONE_X  # noqa: E402
+from models.game import Game  # noqa: E402
+from models.game_manager import DIFFICULTIES, MAX_BOARD_SIZE  # noqa: E402
+
+PLAYERS = ("random",) + DIFFICULTIES
+
+# Tabla resuelta de cada proceso del pool (se abre una vez en el inicializador)
+_solved_table: Optional[SolvedTable] = None
+
+
+def _init_worker(solved_table_path: str):
+    global _solved_table
+    _solved_table = load_solved_table(solved_table_path)
+
+
+def _grid_move(game: Game, player: str, rng: random.Random, time_budget: float) -> int:
+    """Jugada de la IA en un tablero grande (mismas reglas que AIService)."""
+    if player == "easy" or (player == "medium" and rng.random() < MEDIUM_RANDOM_RATE):
+        return rng.choice([i for i, cell in enumerate(game.grid.cells) if not cell])
+    stone = STONE_X if game.turn == "X" else STONE_O
+    return search_move(game.size, game.win_length, game.grid.to_string(), stone,
+                       time_budget)[0]
+
+
+def play_batch(batch: int, first_game: int, games: int, players: tuple, alternate: bool,
+               size: int, win_length: int, seed: int, per_game: bool,
+               time_budget: float = 0.05) -> dict:
+    """Juega un lote de partidas en el proceso actual y retorna sus totales.
+
+    Con `alternate` los jugadores cambian de símbolo en cada partida; los
+    totales se cuentan por jugador ("a" y "b") además de por símbolo.
+    """
+    rng = random.Random(seed)
+    ai = MiniMaxAI(rng=rng, solved_table=_solved_table)
+    result = {"batch": batch, "games": games, "a": 0, "b": 0, "draws": 0,
+              "x_wins": 0, "moves": 0}
+    records = [] if per_game else None
+    start = time.perf_counter()
+    for i in range(games):
+        a_is_x = not alternate or (first_game + i) % 2 == 0
+        by_symbol = {"X": players[0], "O": players[1]} if a_is_x else \
+            {"X": players[1], "O": players[0]}
+        game = Game(size=size, win_length=win_length)
+        capacity = size * size
+        moves = [] if per_game else None
+        while not game.finished:
+            player = by_symbol[game.turn]
+            if player == "random":
+                position = rng.randrange(capacity)
+                while not game.is_valid_move(position):
+                    position = rng.randrange(capacity)
+            elif game.grid is not None:
+                position = _grid_move(game, player, rng, time_budget)
+            elif game.turn == "X":
+                position = ai.get_difficulty_move(game.x_bits, game.o_bits, player)
+            else:
+                position = ai.get_difficulty_move(game.o_bits, game.x_bits, player)
+            game.make_move(position)
+            if per_game:
+                moves.append(position)
+        result["moves"] += game.moves_count
+        if game.winner is None:
+            result["draws"] += 1
+        else:
+            if game.winner == "X":
+                result["x_wins"] += 1
+            result["a" if (game.winner == "X") == a_is_x else "b"] += 1
+        if per_game:
+            records.append({"winner": game.winner, "a_is_x": a_is_x, "moves": moves})
+    result["seconds"] = round(time.perf_counter() - start, 6)
+    if per_game:
+        result["records"] = records
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--players", nargs=2, choices=PLAYERS, default=["hard", "random"],
+                        metavar="JUGADOR", help=f"Jugadores A y B ({', '.join(PLAYERS)})")
+    parser.add_argument("--alternate", action="store_true",
+                        help="Alternar quién juega con X en cada partida")
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--win-length", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", default="selfplay.jsonl",
+                        help="Archivo JSONL con una línea por lote")
+    parser.add_argument("--per-game", action="store_true",
+                        help="Incluir cada partida (ganador y jugadas) en el archivo")
+    parser.add_argument("--solved-table", default=DEFAULT_PATH)
+    parser.add_argument("--time-budget", type=float, default=0.05,
+                        help="Segundos por jugada de la IA en tableros distintos de 3x3")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    win_length = args.win_length or args.size
+    if not 3 <= args.size <= MAX_BOARD_SIZE or not 3 <= win_length <= args.size:
+        parser.error(f"El tablero debe medir entre 3 y {MAX_BOARD_SIZE} y "
+                     f"--win-length no puede superar --size")
+
+    players = tuple(args.players)
+    batches = -(-args.games // args.batch_size)
+    totals = {"games": 0, "a": 0, "b": 0, "draws": 0, "x_wins": 0, "moves": 0}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                             initargs=(args.solved_table,)) as pool, \
+            open(args.output, "w") as out:
+        pending = set()
+        next_batch = 0
+        while next_batch < batches or pending:
+            # Pocos lotes en vuelo: los resultados se escriben y se sueltan
+            while next_batch < batches and len(pending) < args.workers * 2:
+                first_game = next_batch * args.batch_size
+                games = min(args.batch_size, args.games - first_game)
+                pending.add(pool.submit(
+                    play_batch, next_batch, first_game, games, players, args.alternate,
+                    args.size, win_length, args.seed * 1_000_003 + next_batch, args.per_game,
+                    args.time_budget
+                ))
+                next_batch += 1
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                out.write(json.dumps(result) + "\n")
+                for key in totals:
+                    totals[key] += result[key]
+            out.flush()
+
+    elapsed = time.perf_counter() - start
+    games = totals["games"] or 1
+    print(f"{totals['games']:,} partidas en {elapsed:.1f}s "
+          f"({totals['games'] / elapsed:,.0f} partidas/s, {args.workers} procesos)")
+    print(f"A ({players[0]}): {totals['a']:,} victorias ({totals['a'] / games:.2%})")
+    print(f"B ({players[1]}): {totals['b']:,} victorias ({totals['b'] / games:.2%})")
+    print(f"Empates: {totals['draws']:,} ({totals['draws'] / games:.2%}); "
+          f"victorias de X: {totals['x_wins'] / games:.2%}; "
+          f"jugadas por partida: {totals['moves'] / games:.2f}")
+    print(f"Resultados por lote en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
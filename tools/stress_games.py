@@ -0,0 +1,172 @@
+"""Prueba de estrés de concurrencia dentro de un worker.
+
+Lanza en paralelo movimientos, reinicios, chats, desconexiones/reconexiones
+y abandonos sobre muchas partidas, con un backend que cede el event loop en cada acceso
+(como lo haría uno real), y verifica invariantes:
+
+- el tablero de cada partida es coherente (sin casillas dobles, turnos
+  alternados, fin de ronda consistente);
+- cada cliente en modo delta recibe los cambios en orden estricto de `seq`
+  y, aplicándolos, termina con el mismo tablero que el servidor.
+
+Ejemplo:
+    python tools/stress_games.py --games 200 --rounds 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.game import WINNING_BITS, Game  # noqa: E402
+from models.game_manager import DEFAULT_RATE_LIMITS, GameManager  # noqa: E402
+from models.state_backend import InMemoryBackend  # noqa: E402
+
+
+class YieldingBackend(InMemoryBackend):
+    """Backend en memoria que cede el control en cada lectura y escritura."""
+
+    async def load_game(self, game_id):
+        await asyncio.sleep(0)
+        return await super().load_game(game_id)
+
+    async def save_game(self, game, expected_seq=None):
+        await asyncio.sleep(0)
+        return await super().save_game(game, expected_seq)
+
+
+class ReplicaWebSocket:
+    """Cliente en modo delta que reconstruye el tablero con lo que recibe."""
+
+    def __init__(self):
+        self.cells = ["-"] * 9
+        self.seq = -1
+        self.violations = []
+
+    async def send_text(self, data: str):
+        msg = json.loads(data)
+        mtype = msg.get("type")
+        if mtype == "game_state":
+            if msg["seq"] < self.seq:
+                self.violations.append(f"snapshot viejo {msg['seq']} < {self.seq}")
+            self.cells = [cell for row in msg["board"] for cell in row]
+            self.seq = msg["seq"]
+        elif mtype in ("game_delta", "game_reset"):
+            if msg["seq"] <= self.seq:
+                self.violations.append(f"{mtype} fuera de orden {msg['seq']} <= {self.seq}")
+            if mtype == "game_delta":
+                self.cells[msg["cell"]] = msg["symbol"]
+            else:
+                self.cells = [cell for row in msg["board"] for cell in row]
+            self.seq = msg["seq"]
+
+    async def close(self):
+        pass
+
+
+def _check_game(game: Game) -> list:
+    errors = []
+    x_count = bin(game.x_bits).count("1")
+    o_count = bin(game.o_bits).count("1")
+    if game.x_bits & game.o_bits:
+        errors.append("casilla con X y O")
+    if x_count - o_count not in (0, 1):
+        errors.append(f"turnos desbalanceados X={x_count} O={o_count}")
+    if game.moves_count != x_count + o_count:
+        errors.append("moves_count no coincide con el tablero")
+    if WINNING_BITS[game.x_bits] and WINNING_BITS[game.o_bits]:
+        errors.append("ganan ambos")
+    if game.finished != (WINNING_BITS[game.x_bits] or WINNING_BITS[game.o_bits]
+                         or game.moves_count == 9):
+        errors.append("estado 'finished' incoherente")
+    return errors
+
+
+async def run(games: int, rounds: int, seed: int) -> int:
+    rng = random.Random(seed)
+    unlimited = {mtype: (1e12, 1e12) for mtype in DEFAULT_RATE_LIMITS}
+    manager = GameManager(backend=YieldingBackend(), rate_limits=unlimited,
+                          heartbeat_interval=0)
+    await manager.start()
+    players = []
+    for _ in range(games * 2):
+        players.append(await manager.connect_player(ReplicaWebSocket(), delta_mode=True))
+    await manager._run_matchmaking()
+    await asyncio.sleep(0.01)
+    sockets = {player.id: player.websocket for player in players}
+    retired = []
+
+    async def reconnect(player):
+        await manager.disconnect_player(player)
+        await asyncio.sleep(0)
+        retired.append(sockets[player.id])
+        player.websocket = sockets[player.id] = ReplicaWebSocket()
+        await manager.connect_and_pair(player)
+
+    async def abandon(player):
+        # Desconexión definitiva: la limpieza corre sin esperar CLEANUP_DELAY
+        await manager.disconnect_player(player)
+        await manager._cleanup_player(player.id)
+
+    for _ in range(rounds):
+        ops = []
+        for player in list(players):
+            roll = rng.random()
+            if roll < 0.75:
+                ops.append(manager.handle_message(
+                    player, {"type": "move", "position": rng.randrange(9)}
+                ))
+            elif roll < 0.85:
+                ops.append(manager.handle_message(player, {"type": "game_reset"}))
+            elif roll < 0.95:
+                ops.append(manager.handle_message(
+                    player, {"type": "chat_message", "message": "hola"}
+                ))
+            elif roll < 0.995:
+                ops.append(reconnect(player))
+            else:
+                players.remove(player)
+                ops.append(abandon(player))
+        rng.shuffle(ops)
+        await asyncio.gather(*ops)
+    # Dejar que los escritores vacíen las colas
+    await asyncio.sleep(0.05)
+
+    failures = 0
+    for game in manager.games.values():
+        errors = _check_game(game)
+        server_cells = [cell for row in game.board for cell in row]
+        for player_id in (game.player_x, game.player_o):
+            replica = sockets[player_id]
+            errors.extend(replica.violations)
+            if replica.cells != server_cells:
+                errors.append(f"réplica de {player_id} distinta del servidor")
+        if errors:
+            failures += 1
+            if failures <= 5:
+                print(f"Partida {game.id}: {errors[:3]}")
+    stale = sum(len(replica.violations) for replica in retired)
+    if len(manager._game_locks) > len(manager.games):
+        failures += 1
+        print(f"Locks sin liberar: {len(manager._game_locks)} para {len(manager.games)} partidas")
+    print(f"{len(manager.games)} partidas, {rounds} rondas: {failures} con invariantes rotos, "
+          f"{stale} frames fuera de orden en sockets reemplazados")
+    await manager.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    failures = asyncio.run(run(args.games, args.rounds, args.seed))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Optional
+
+
+class AdmissionLimiter:
+    """Limita los handshakes de websocket que se procesan a la vez.
+
+    Durante una tormenta de reconexiones los que exceden el cupo esperan hasta
+    `timeout` segundos y luego se rechazan, en lugar de encolarse sin límite y
+    hacer crecer la latencia del accept para todos.
+
+    El semáforo se crea en `start()`, ya dentro del loop del servidor: en
+    Python 3.9 un Semaphore queda ligado al loop vigente al construirlo.
+    """
+
+    def __init__(self, max_concurrent: int = 256, timeout: float = 2.0):
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def start(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    async def acquire(self) -> bool:
+        """Reserva un cupo; retorna False si no se obtuvo a tiempo."""
+        if self._semaphore.locked():
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                return False
+        else:
+            # Camino rápido: hay cupo libre, no hace falta un temporizador
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
@@ -1,26 +1,42 @@
 from typing import List, Tuple, Optional
 
-def check_winner(board: List[List[str]]) -> Optional[str]:
-    # Check rows
-    for row in board:
-        if len(set(row)) == 1 and row[0] is not None:
-            return row[0]
-    
-    # Check columns
-    for col in range(3):
-        if (board[0][col] == board[1][col] == board[2][col]) and board[0][col] is not None:
-            return board[0][col]
-    
-    # Check diagonals
-    if (board[0][0] == board[1][1] == board[2][2]) and board[0][0] is not None:
-        return board[0][0]
-    if (board[0][2] == board[1][1] == board[2][0]) and board[0][2] is not None:
-        return board[0][2]
-    
+from models.board import DIRECTIONS
+
+# Valores que representan una casilla vacía
+EMPTY_CELLS = (None, "-")
+
+
+def check_winner(board: List[List[str]], win_length: Optional[int] = None) -> Optional[str]:
+    """Ganador de un tablero N×N con `win_length` en línea (por defecto N).
+
+    Recorre todo el tablero; durante una partida es mejor `Board.place`,
+    que solo revisa las líneas de la última ficha.
+    """
+    size = len(board)
+    need = win_length or size
+    for row in range(size):
+        for col in range(size):
+            symbol = board[row][col]
+            if symbol in EMPTY_CELLS:
+                continue
+            for dr, dc in DIRECTIONS:
+                # Solo desde el inicio de la línea, para no contarla dos veces
+                r, c = row - dr, col - dc
+                if 0 <= r < size and 0 <= c < size and board[r][c] == symbol:
+                    continue
+                count = 1
+                r, c = row + dr, col + dc
+                while count < need and 0 <= r < size and 0 <= c < size and board[r][c] == symbol:
+                    count += 1
+                    r += dr
+                    c += dc
+                if count >= need:
+                    return symbol
     return None
 
+
 def is_valid_move(board: List[List[str]], position: Tuple[int, int]) -> bool:
     row, col = position
-    if 0 <= row < 3 and 0 <= col < 3:
-        return board[row][col] is None
-    return False
\ No newline at end of file
+    if 0 <= row < len(board) and 0 <= col < len(board):
+        return board[row][col] in EMPTY_CELLS
+    return False
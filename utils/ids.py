@@ -0,0 +1,11 @@
+import secrets
+import sys
+
+
+def new_id() -> str:
+    """Identificador compacto: 12 caracteres base64url (72 bits aleatorios).
+
+    Ocupa menos que un UUID de 36 caracteres y se interna, así jugadores,
+    partidas y diccionarios comparten el mismo objeto string.
+    """
+    return sys.intern(secrets.token_urlsafe(9))
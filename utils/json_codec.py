@@ -0,0 +1,15 @@
+import json
+from typing import Any
+
+# orjson es opcional: si está instalado se usa como codificador rápido
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+def encode_message(message: Any) -> str:
+    """Serializa un mensaje a un frame de texto JSON listo para enviar."""
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
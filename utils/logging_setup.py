@@ -0,0 +1,41 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+def setup_logging(level: int = logging.INFO) -> QueueListener:
+    """Configura el logging raíz con un handler no bloqueante.
+
+    Los registros se encolan en el event loop y un hilo del QueueListener
+    los formatea y escribe, así la E/S de logs no retrasa los handshakes.
+    Hay que llamar a `stop()` sobre el listener al apagar para vaciar la cola.
+    """
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    listener = QueueListener(records, handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(QueueHandler(records))
+    root.setLevel(level)
+    listener.start()
+    return listener
+
+
+class LogSampler:
+    """Decide si registrar un evento frecuente: uno de cada `every`."""
+
+    __slots__ = ("every", "_count")
+
+    def __init__(self, every: int = 100):
+        self.every = max(1, every)
+        self._count = 0
+
+    def __call__(self) -> bool:
+        self._count += 1
+        if self._count >= self.every:
+            self._count = 0
+            return True
+        return False
@@ -0,0 +1,106 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+import utils.message_types as mt
+
+
+class Field(ABC):
+    """Regla de validación de un campo de un mensaje entrante."""
+
+    __slots__ = ("required", "error")
+
+    def __init__(self, required: bool = True, error: str = ""):
+        self.required = required
+        self.error = error
+
+    @abstractmethod
+    def check(self, value: Any) -> bool:
+        """True si `value` cumple la regla."""
+
+
+class IntField(Field):
+    """Entero (no booleano) dentro de [minimum, maximum]."""
+
+    __slots__ = ("minimum", "maximum")
+
+    def __init__(self, minimum: int, maximum: int, required: bool = True, error: str = ""):
+        super().__init__(required, error)
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def check(self, value: Any) -> bool:
+        return type(value) is int and self.minimum <= value <= self.maximum
+
+
+class TextField(Field):
+    """Texto no vacío (sin contar espacios) de hasta `max_length` caracteres."""
+
+    __slots__ = ("max_length",)
+
+    def __init__(self, max_length: int, required: bool = True, error: str = ""):
+        super().__init__(required, error)
+        self.max_length = max_length
+
+    def check(self, value: Any) -> bool:
+        return type(value) is str and 0 < len(value) <= self.max_length and not value.isspace()
+
+
+class ChoiceField(Field):
+    """Uno de un conjunto fijo de valores."""
+
+    __slots__ = ("choices",)
+
+    def __init__(self, *choices: Any, required: bool = True, error: str = ""):
+        super().__init__(required, error)
+        self.choices = frozenset(choices)
+
+    def check(self, value: Any) -> bool:
+        return value in self.choices
+
+
+class MessageSchema:
+    """Esquema declarativo de un tipo de mensaje.
+
+    Los campos se compilan a una tupla al crearlo, así validar un mensaje es
+    un recorrido corto sin construir nada. `validate` retorna el mensaje de
+    error del primer campo inválido o None si el mensaje es válido.
+    """
+
+    __slots__ = ("type", "_fields")
+
+    def __init__(self, message_type: mt.MessageType, **fields: Field):
+        self.type = message_type.value
+        self._fields: Tuple[Tuple[str, Field], ...] = tuple(fields.items())
+
+    def validate(self, data: Dict[str, Any]) -> Optional[str]:
+        for name, field in self._fields:
+            value = data.get(name)
+            if value is None:
+                if field.required:
+                    return field.error
+                continue
+            if not field.check(value):
+                return field.error
+        return None
+
+
+# Esquemas de los mensajes que acepta el servidor, por tipo
+MESSAGE_SCHEMAS: Dict[str, MessageSchema] = {
+    schema.type: schema
+    for schema in (
+        MessageSchema(
+            mt.MessageType.MOVE,
+            position=IntField(0, 8, error="Error en el movimiento: Posición debe ser un número entre 0 y 8"),
+        ),
+        MessageSchema(mt.MessageType.GAME_RESET),
+        MessageSchema(
+            mt.MessageType.CHAT_MESSAGE,
+            message=TextField(500, error="Mensaje vacío o demasiado largo"),
+        ),
+        MessageSchema(mt.MessageType.PONG),
+        MessageSchema(
+            mt.MessageType.SYNC,
+            protocol=ChoiceField("delta", "full", required=False, error="Protocolo inválido"),
+        ),
+    )
+}
@@ -6,6 +6,9 @@ class MessageType(Enum):
     CONNECT = "connect"                    # Cliente se conecta al servidor
     DISCONNECT = "disconnect"              # Cliente se desconecta
     RECONNECT = "reconnect"               # Cliente intenta reconectarse
+    JOIN = "join"                          # Primer frame: nueva sesión con nombre
+    RESUME = "resume"                      # Primer frame: reanudar sesión por playerId
+    REGISTERED = "registered"              # Identidad (playerId y token) de la sesión
     
     # Mensajes de estado del juego
     WAITING = "waiting"                    # Esperando a otro jugador
@@ -13,6 +16,9 @@ class MessageType(Enum):
     GAME_STATE = "game_state"             # Actualización del estado del juego
     GAME_OVER = "game_over"               # Juego terminado
     GAME_RESET = "game_reset"             # Reiniciar el juego
+    GAME_ABANDONED = "game_abandoned"     # El rival abandonó la partida
+    GAME_DELTA = "game_delta"             # Cambio incremental (solo la casilla jugada)
+    SYNC = "sync"                         # Cliente pide snapshot completo / cambia de protocolo
     
     # Mensajes de jugador
     PLAYER_JOINED = "player_joined"       # Nuevo jugador se une
@@ -27,6 +33,8 @@ class MessageType(Enum):
     
     # Mensajes de chat
     CHAT_MESSAGE = "chat_message"         # Mensaje de chat
+    CHAT_BATCH = "chat_batch"             # Varias líneas de chat en un solo frame
+    CHAT_HISTORY = "chat_history"         # Historial reciente al reconectar
     
     # Mensajes de error
     ERROR = "error"                       # Error general
@@ -75,6 +83,36 @@ class MessageBuilder:
             "winner": winner
         })
 
+    @staticmethod
+    def game_snapshot(board: list, turn: str, seq: int, wins: Dict[str, int],
+                      player_x: Dict[str, Any], player_o: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Crea un snapshot completo del estado; se envía al unirse, reanudar o
+        cuando el cliente detecta un hueco en la secuencia
+        """
+        return MessageBuilder.create_message(MessageType.GAME_STATE, {
+            "board": board,
+            "current_player": turn,
+            "seq": seq,
+            "wins": wins,
+            "player_x": player_x,
+            "player_o": player_o
+        })
+
+    @staticmethod
+    def game_delta(seq: int, cell: int, symbol: str, turn: str) -> Dict[str, Any]:
+        """
+        Crea un delta con la casilla que cambió. Se omite el timestamp para
+        mantener el frame lo más pequeño posible
+        """
+        return {
+            "type": MessageType.GAME_DELTA.value,
+            "seq": seq,
+            "cell": cell,
+            "symbol": symbol,
+            "turn": turn
+        }
+
     @staticmethod
     def move_result(success: bool, message: str = None, board: list = None) -> Dict[str, Any]:
         """
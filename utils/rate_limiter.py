@@ -0,0 +1,67 @@
+import time
+from enum import Enum
+from typing import Dict, Hashable, Optional
+
+
+class ThrottleAction(Enum):
+    """Qué hacer con un frame que excede el presupuesto de su tipo."""
+    DROP = "drop"              # Descartarlo
+    DELAY = "delay"            # Esperar al siguiente token antes de procesarlo
+    DISCONNECT = "disconnect"  # Cerrar la conexión del cliente
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class TokenBucketLimiter:
+    """Token bucket por cliente: hasta `capacity` frames en ráfaga y
+    `refill_rate` tokens por segundo de forma sostenida.
+
+    Los tokens se recalculan solo cuando el cliente envía algo (reloj
+    monotónico), sin tareas ni temporizadores por cliente.
+    """
+
+    def __init__(self, capacity: float = 100, refill_rate: float = 10.0):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._buckets: Dict[Hashable, _Bucket] = {}
+
+    def _refill(self, client_id: Hashable, now: float) -> _Bucket:
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = self._buckets[client_id] = _Bucket(self.capacity, now)
+            return bucket
+        tokens = bucket.tokens + (now - bucket.updated) * self.refill_rate
+        bucket.tokens = tokens if tokens < self.capacity else self.capacity
+        bucket.updated = now
+        return bucket
+
+    def is_allowed(self, client_id: Hashable, now: Optional[float] = None) -> bool:
+        """Consume un token si hay; retorna False si el cliente excedió su límite."""
+        bucket = self._refill(client_id, time.monotonic() if now is None else now)
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return True
+        return False
+
+    def reserve(self, client_id: Hashable, now: Optional[float] = None) -> float:
+        """Consume un token aunque no haya y retorna cuántos segundos esperar.
+
+        Los tokens quedan en negativo, así frames sucesivos esperan en fila.
+        """
+        bucket = self._refill(client_id, time.monotonic() if now is None else now)
+        bucket.tokens -= 1
+        if bucket.tokens >= 0:
+            return 0.0
+        return -bucket.tokens / self.refill_rate
+
+    def forget(self, client_id: Hashable):
+        self._buckets.pop(client_id, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
@@ -0,0 +1,43 @@
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class RingBuffer(Generic[T]):
+    """Buffer circular de tamaño fijo sobre una lista preasignada.
+
+    Agregar es O(1) y la memoria no crece: al llenarse, cada elemento nuevo
+    reemplaza al más antiguo.
+    """
+
+    __slots__ = ("_items", "_start", "_size")
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("La capacidad debe ser positiva")
+        self._items: List[Optional[T]] = [None] * capacity
+        self._start = 0  # Índice del elemento más antiguo
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._items)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, item: T):
+        capacity = len(self._items)
+        if self._size < capacity:
+            self._items[(self._start + self._size) % capacity] = item
+            self._size += 1
+        else:
+            self._items[self._start] = item
+            self._start = (self._start + 1) % capacity
+
+    def to_list(self) -> List[T]:
+        """Elementos del más antiguo al más reciente."""
+        end = self._start + self._size
+        if end <= len(self._items):
+            return self._items[self._start:end]
+        return self._items[self._start:] + self._items[:end - len(self._items)]
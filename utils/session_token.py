@@ -0,0 +1,47 @@
+import base64
+import hashlib
+import hmac
+import secrets
+from typing import Any, Optional
+
+# Prefijo de lo que se firma para las claves de jugador
+KEY_PREFIX = "key:"
+
+
+class SessionSigner:
+    """Firma el id de un jugador para que solo su cliente pueda reanudar la sesión.
+
+    El id viaja a los rivales en cada snapshot, así que por sí solo no
+    alcanza para reclamar la conexión. Sin secreto configurado se usa uno
+    aleatorio por proceso: los tokens no sirven tras un reinicio ni en
+    otro worker.
+
+    También emite la clave de jugador (`<id>.<firma>`), la identidad estable
+    que el cliente guarda y manda al unirse; sus estadísticas cuelgan de ese
+    id. Se firma con otro prefijo para que un token de sesión no valga como
+    clave.
+    """
+
+    def __init__(self, secret: Optional[str] = None):
+        self.ephemeral = not secret
+        self._key = secret.encode() if secret else secrets.token_bytes(32)
+
+    def sign(self, player_id: str) -> str:
+        digest = hmac.new(self._key, player_id.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest[:18]).decode()
+
+    def verify(self, player_id: str, token: Any) -> bool:
+        return isinstance(token, str) and hmac.compare_digest(self.sign(player_id), token)
+
+    def player_key(self, key_id: str) -> str:
+        """Clave firmada que el cliente guarda para el id estable `key_id`."""
+        return f"{key_id}.{self.sign(KEY_PREFIX + key_id)}"
+
+    def key_id(self, player_key: Any) -> Optional[str]:
+        """Id estable de una clave de jugador, o None si no es válida."""
+        if not isinstance(player_key, str) or player_key.count(".") != 1:
+            return None
+        key_id, signature = player_key.split(".")
+        if not key_id or not self.verify(KEY_PREFIX + key_id, signature):
+            return None
+        return key_id
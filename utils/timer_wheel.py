@@ -0,0 +1,84 @@
+import math
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+
+
+class _Timer:
+    __slots__ = ("key", "rounds", "callback")
+
+    def __init__(self, key: Hashable, rounds: int, callback: Callable):
+        self.key = key
+        self.rounds = rounds
+        self.callback = callback
+
+
+class TimerWheel:
+    """Rueda de temporizadores con hashing (resolución de un tick).
+
+    Programar y cancelar cuestan O(1); cada temporizador se identifica por una
+    clave, así que reprogramar la misma clave reemplaza al anterior en lugar
+    de duplicarlo. `advance` retorna en un solo lote todos los callbacks que
+    vencieron desde la última llamada.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 512):
+        self.tick = tick
+        self._slots: List[Dict[Hashable, _Timer]] = [{} for _ in range(slots)]
+        self._slot_of: Dict[Hashable, int] = {}  # clave -> índice de la ranura
+        self._cursor = 0
+        self._last_tick: Optional[float] = None
+
+    def __len__(self) -> int:
+        """Número de temporizadores pendientes."""
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot_of
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable,
+                 now: Optional[float] = None):
+        """Programa `callback` para dentro de `delay` segundos bajo la clave `key`."""
+        if self._last_tick is None:
+            self._last_tick = time.monotonic() if now is None else now
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        num_slots = len(self._slots)
+        slot = (self._cursor + ticks) % num_slots
+        rounds = (ticks - 1) // num_slots
+        self._slots[slot][key] = _Timer(key, rounds, callback)
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancela el temporizador de `key`; retorna False si no existía."""
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        del self._slots[slot][key]
+        return True
+
+    def advance(self, now: Optional[float] = None) -> List[Callable]:
+        """Avanza la rueda hasta `now` y retorna los callbacks vencidos."""
+        now = time.monotonic() if now is None else now
+        if self._last_tick is None:
+            self._last_tick = now
+            return []
+        elapsed = int((now - self._last_tick) / self.tick)
+        if elapsed <= 0:
+            return []
+        self._last_tick += elapsed * self.tick
+
+        due = []
+        num_slots = len(self._slots)
+        for _ in range(elapsed):
+            self._cursor = (self._cursor + 1) % num_slots
+            bucket = self._slots[self._cursor]
+            if not bucket:
+                continue
+            for key, timer in list(bucket.items()):
+                if timer.rounds > 0:
+                    timer.rounds -= 1
+                    continue
+                del bucket[key]
+                del self._slot_of[key]
+                due.append(timer.callback)
+        return due